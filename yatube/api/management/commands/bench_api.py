@@ -0,0 +1,72 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from api.serializers import POST_FIELDS, serialize
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def serialize_values(limit):
+    rows = Post.objects.values(*POST_FIELDS.values())[:limit]
+    return json.dumps(serialize(rows, POST_FIELDS), cls=DjangoJSONEncoder)
+
+
+def serialize_models(limit):
+    posts = Post.objects.select_related('author', 'group')[:limit]
+    return json.dumps([
+        {
+            'id': post.id,
+            'text': post.text,
+            'pub_date': post.pub_date,
+            'author': post.author.username,
+            'group': post.group.slug if post.group else None,
+            'image': post.image.url if post.image else None,
+        }
+        for post in posts
+    ], cls=DjangoJSONEncoder)
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет стоимость сериализации постов API в пересчёте на 1000 '
+        'постов: строки values() против экземпляров моделей. Данные '
+        'создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        count = options['posts']
+        with transaction.atomic():
+            author = User.objects.create_user(username='bench_api_author')
+            group = Group.objects.create(
+                title='Bench', slug='bench-api', description='bench'
+            )
+            Post.objects.bulk_create(
+                Post(text='Текст поста ' * 20, author=author, group=group)
+                for _ in range(count)
+            )
+            for name, func in (('values()', serialize_values),
+                               ('models', serialize_models)):
+                best = min(
+                    self.measure(func, count)
+                    for _ in range(options['repeat'])
+                )
+                self.stdout.write(
+                    f'{name:10} {best * 1000 * 1000 / count:8.2f} мс '
+                    f'на 1000 постов'
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, func, count):
+        started = time.perf_counter()
+        func(count)
+        return time.perf_counter() - started
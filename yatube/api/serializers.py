@@ -0,0 +1,92 @@
+from django.conf import settings
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'pub_date': 'pub_date',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+}
+PROFILE_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'posts_count': 'posts_count',
+    'followers_count': 'followers_count',
+    'following_count': 'following_count',
+    'is_following': 'is_following',
+}
+
+
+def _media_url(path):
+    return settings.MEDIA_URL + path if path else None
+
+
+CONVERTERS = {
+    'image': _media_url,
+}
+
+
+def post_to_dict(post):
+    """Словарь поста со всеми полями POST_FIELDS из экземпляра модели."""
+    return {
+        'id': post.id,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'image': _media_url(post.image.name),
+    }
+
+
+def profile_to_dict(author):
+    return {name: getattr(author, name) for name in PROFILE_FIELDS}
+
+
+def only_fields(item, fields):
+    return None if item is None else {name: item[name] for name in fields}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def select_fields(schema, requested):
+    """Оставить в схеме только поля из параметра fields=a,b,c."""
+    if not requested:
+        return schema
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(schema))
+    if unknown:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}')
+    return {name: schema[name] for name in names}
+
+
+def serialize(rows, fields):
+    """Превратить строки values() в словари ответа без создания моделей."""
+    plan = [
+        (name, lookup, CONVERTERS.get(name))
+        for name, lookup in fields.items()
+    ]
+    return [
+        {
+            name: convert(row[lookup]) if convert else row[lookup]
+            for name, lookup, convert in plan
+        }
+        for row in rows
+    ]
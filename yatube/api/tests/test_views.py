@@ -0,0 +1,169 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='api_user')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            description='test description',
+            slug='test-group'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'post {num}', author=cls.user, group=cls.group)
+            for num in range(25)
+        )
+        cls.post = Post.objects.create(text='latest', author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='hi')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_posts_cursor_pagination(self):
+        """Курсор проходит все посты без повторов и пропусков."""
+        url = reverse('api:posts') + '?limit=10'
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen += [post['id'] for post in data['results']]
+            url = data['next']
+
+        self.assertEqual(len(seen), Post.objects.count())
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(seen[0], ApiTests.post.pk)
+
+    def test_sparse_fieldsets(self):
+        """Параметр fields оставляет в ответе только нужные поля."""
+        data = self.client.get(
+            reverse('api:posts'), {'fields': 'id,author'}
+        ).json()
+
+        self.assertEqual(
+            data['results'][0],
+            {'id': ApiTests.post.pk, 'author': ApiTests.user.username}
+        )
+
+    def test_unknown_field_is_rejected(self):
+        """Неизвестное поле в fields даёт ошибку 400."""
+        response = self.client.get(reverse('api:posts'), {'fields': 'nope'})
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_invalid_cursor_is_rejected(self):
+        """Испорченный курсор даёт ошибку 400."""
+        response = self.client.get(reverse('api:posts'), {'cursor': '%%%'})
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_posts_page_is_one_query(self):
+        """Страница постов читается одним запросом."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:posts'))
+
+    def test_post_comments_and_profile(self):
+        """Пост, его комментарии и профиль автора отдаются в JSON."""
+        post = self.client.get(
+            reverse('api:post', kwargs={'post_id': ApiTests.post.pk})
+        ).json()
+        comments = self.client.get(
+            reverse('api:comments', kwargs={'post_id': ApiTests.post.pk})
+        ).json()
+        profile = self.client.get(
+            reverse('api:profile', kwargs={'username': 'api_user'})
+        ).json()
+
+        self.assertEqual(post['text'], 'latest')
+        self.assertEqual(comments['results'][0]['author'], 'api_reader')
+        self.assertEqual(profile['posts_count'], 26)
+        self.assertEqual(profile['followers_count'], 1)
+
+    def test_missing_post_is_404(self):
+        """Несуществующий пост даёт JSON-ответ 404."""
+        response = self.client.get(
+            reverse('api:post', kwargs={'post_id': 10 ** 6})
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertIn('detail', response.json())
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованному юзеру."""
+        response = self.client.get(reverse('api:follow'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+        self.client.force_login(ApiTests.reader)
+        data = self.client.get(reverse('api:follow')).json()
+        self.assertEqual(data['results'][0]['id'], ApiTests.post.pk)
+
+
+class BatchApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='batch_user')
+        cls.posts = [
+            Post.objects.create(text=f'post {num}', author=cls.user)
+            for num in range(3)
+        ]
+        cls.ids = ','.join(str(post.pk) for post in cls.posts)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_batch_returns_posts_and_profiles(self):
+        """Посты и профили возвращаются одним ответом, пропуски - null."""
+        data = self.client.get(reverse('api:batch'), {
+            'posts': f'{BatchApiTests.ids},999999',
+            'profiles': 'batch_user,nobody',
+        }).json()
+
+        self.assertEqual(
+            data['posts'][str(BatchApiTests.posts[0].pk)]['text'], 'post 0'
+        )
+        self.assertIsNone(data['posts']['999999'])
+        self.assertEqual(data['profiles']['batch_user']['posts_count'], 3)
+        self.assertIsNone(data['profiles']['nobody'])
+
+    def test_cached_posts_skip_loading(self):
+        """Повторный запрос берёт посты из кэша: читаются только версии."""
+        self.client.get(reverse('api:batch'), {'posts': BatchApiTests.ids})
+
+        with self.assertNumQueries(1):
+            self.client.get(
+                reverse('api:batch'), {'posts': BatchApiTests.ids}
+            )
+
+    def test_edited_post_is_not_served_from_cache(self):
+        """После правки поста кэш не отдаёт старую версию."""
+        post = BatchApiTests.posts[0]
+        self.client.get(reverse('api:batch'), {'posts': post.pk})
+        post.text = 'edited'
+        post.save()
+        data = self.client.get(
+            reverse('api:batch'), {'posts': post.pk}
+        ).json()
+
+        self.assertEqual(data['posts'][str(post.pk)]['text'], 'edited')
+
+    @override_settings(API_BATCH_MAX=2)
+    def test_batch_size_is_limited(self):
+        """Слишком большой пакет отклоняется."""
+        response = self.client.get(
+            reverse('api:batch'), {'posts': BatchApiTests.ids}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('posts/<int:post_id>/', views.post, name='post'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
+    path('groups/', views.groups, name='groups'),
+    path('profiles/<str:username>/', views.profile, name='profile'),
+    path('follow/', views.follow, name='follow'),
+    path('batch/', views.batch, name='batch'),
+]
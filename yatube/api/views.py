@@ -0,0 +1,191 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from core.pagination import InvalidCursor, paginate_by_cursor
+from posts.models import Comment, Group, Post
+from posts.profile_header import with_profile_stats
+from posts.scope_versions import get_versions, post_scope
+
+from .serializers import (COMMENT_FIELDS, GROUP_FIELDS, POST_FIELDS,
+                          PROFILE_FIELDS, FieldsError, only_fields,
+                          post_to_dict, profile_to_dict, select_fields,
+                          serialize)
+
+User = get_user_model()
+
+POSTS_ORDERING = ('-pub_date', '-id')
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def _error(message, status):
+    return _json({'detail': message}, status=status)
+
+
+def _limit(request):
+    limit = int(request.GET.get('limit', settings.POST_PER_PAGE))
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def _list(request, queryset, schema, ordering):
+    """Страница списка с курсором и выбором полей."""
+    try:
+        fields = select_fields(schema, request.GET.get('fields'))
+        keys = {key.lstrip('-') for key in ordering}
+        rows, cursor = paginate_by_cursor(
+            queryset.values(*(set(fields.values()) | keys)),
+            request.GET.get('cursor'),
+            _limit(request),
+            ordering,
+        )
+    except (FieldsError, InvalidCursor, ValueError) as error:
+        return _error(str(error), 400)
+    next_url = None
+    if cursor is not None:
+        query = request.GET.copy()
+        query['cursor'] = cursor
+        next_url = request.build_absolute_uri(
+            f'{request.path}?{query.urlencode()}'
+        )
+    return _json({'results': serialize(rows, fields), 'next': next_url})
+
+
+def _detail(request, queryset, schema):
+    try:
+        fields = select_fields(schema, request.GET.get('fields'))
+    except FieldsError as error:
+        return _error(str(error), 400)
+    row = queryset.values(*set(fields.values())).first()
+    if row is None:
+        return _error('Не найдено', 404)
+    return _json(serialize([row], fields)[0])
+
+
+@require_GET
+def posts(request):
+    queryset = Post.objects.all()
+    if 'group' in request.GET:
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return _list(request, queryset, POST_FIELDS, POSTS_ORDERING)
+
+
+@require_GET
+def post(request, post_id):
+    return _detail(request, Post.objects.filter(pk=post_id), POST_FIELDS)
+
+
+@require_GET
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return _error('Не найдено', 404)
+    return _list(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS,
+        ('pub_date', 'id'),
+    )
+
+
+@require_GET
+def groups(request):
+    return _list(request, Group.objects.all(), GROUP_FIELDS, ('id',))
+
+
+@require_GET
+def profile(request, username):
+    authors = with_profile_stats(
+        User.objects.filter(username=username), request.user
+    )
+    return _detail(request, authors, PROFILE_FIELDS)
+
+
+@require_GET
+def follow(request):
+    if not request.user.is_authenticated:
+        return _error('Требуется авторизация', 401)
+    return _list(
+        request,
+        Post.objects.filter(author__following__user=request.user),
+        POST_FIELDS,
+        POSTS_ORDERING,
+    )
+
+
+def _split(request, name):
+    return [item for item in request.GET.get(name, '').split(',') if item]
+
+
+def _batch_posts(post_ids):
+    """Посты по id: из кэша get_many, промахи - одним in_bulk.
+
+    Ключ кэша содержит версию поста, поэтому правка или удаление поста
+    сразу делают старую запись недоступной во всех процессах.
+    """
+    versions = get_versions(*(post_scope(pk) for pk in post_ids))
+    keys = {
+        pk: f'api:post:{pk}:{versions[post_scope(pk)][0]}'
+        for pk in post_ids
+    }
+    cached = cache.get_many(keys.values())
+    found = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in post_ids if pk not in found]
+    if missing:
+        loaded = {
+            pk: post_to_dict(post)
+            for pk, post in Post.objects.select_related('author', 'group')
+            .in_bulk(missing).items()
+        }
+        cache.set_many(
+            {keys[pk]: item for pk, item in loaded.items()},
+            settings.API_BATCH_CACHE_TIMEOUT
+        )
+        found.update(loaded)
+    return found
+
+
+@require_GET
+def batch(request):
+    """Несколько постов и профилей за один запрос."""
+    try:
+        post_ids = [int(pk) for pk in _split(request, 'posts')]
+        post_fields = select_fields(
+            POST_FIELDS, request.GET.get('post_fields')
+        )
+        profile_fields = select_fields(
+            PROFILE_FIELDS, request.GET.get('profile_fields')
+        )
+    except (FieldsError, ValueError) as error:
+        return _error(str(error), 400)
+    usernames = _split(request, 'profiles')
+    if len(post_ids) + len(usernames) > settings.API_BATCH_MAX:
+        return _error(
+            f'Не больше {settings.API_BATCH_MAX} объектов за запрос', 400
+        )
+    posts = _batch_posts(post_ids) if post_ids else {}
+    profiles = {}
+    if usernames:
+        profiles = {
+            username: profile_to_dict(author)
+            for username, author in with_profile_stats(
+                User.objects.all(), request.user
+            ).in_bulk(usernames, field_name='username').items()
+        }
+    return _json({
+        'posts': {
+            str(pk): only_fields(posts.get(pk), post_fields)
+            for pk in post_ids
+        },
+        'profiles': {
+            username: only_fields(profiles.get(username), profile_fields)
+            for username in usernames
+        },
+    })
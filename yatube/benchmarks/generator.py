@@ -0,0 +1,284 @@
+import functools
+import io
+import math
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import OperationalError, connection, transaction
+from django.db.models import Max
+from PIL import Image, ImageDraw
+
+from posts.group_stats import rebuild_all
+from posts.models import Comment, Follow, Group, Post
+from posts.popularity import rebuild
+from posts.scope_versions import INDEX_SCOPE, bump_versions
+from posts.sitemaps import bump_all_shards
+from posts.tagging import reindex
+
+from .world import bulk_create, sentence_pool
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'gen'
+PLACEHOLDER_SIZE = (960, 339)
+SENTENCES = 2000
+CHUNK_RETRIES = 10
+
+_sentences = functools.lru_cache()(sentence_pool)
+
+
+@dataclass
+class Plan:
+    """Что и сколько создать; первые id заданы явно, поэтому процессы
+    пишут непересекающиеся диапазоны и не спрашивают id у базы."""
+    users: int
+    groups: int
+    posts: int
+    comments: int
+    follows_per_user: int = 20
+    image_share: float = 0.0
+    days: int = 365
+    exponent: float = 1.1
+    seed: int = 0
+    first_user: int = 1
+    first_group: int = 1
+    first_post: int = 1
+    first_comment: int = 1
+    images: list = field(default_factory=list)
+    started: object = None
+
+
+def next_ids():
+    """Первые свободные id пользователей, групп, постов и комментариев."""
+    return {
+        f'first_{name}': (model.objects.aggregate(top=Max('pk'))['top']
+                          or 0) + 1
+        for name, model in (('user', User), ('group', Group),
+                            ('post', Post), ('comment', Comment))
+    }
+
+
+def power_law_rank(rng, count, exponent):
+    """Ранг 0..count-1 из степенного распределения обратной функцией:
+    без таблицы весов даже для миллионов элементов."""
+    if count <= 1:
+        return 0
+    power = 1 - exponent
+    top = count ** power if power else math.log(count)
+    value = rng.random() * (top - 1 if power else top)
+    rank = (value + 1) ** (1 / power) if power else math.exp(value)
+    return min(count - 1, int(rank) - 1)
+
+
+def permute(rank, count, seed):
+    """Псевдослучайная перестановка рангов, чтобы популярность не
+    совпадала с порядком id."""
+    stride = 7919 + seed
+    while math.gcd(stride, count) != 1:
+        stride += 1
+    return (rank * stride + seed) % count
+
+
+def text_of(rng, sentences, median, limit):
+    """Текст логнормальной длины: в основном короткий, иногда длинный."""
+    count = int(rng.lognormvariate(math.log(median), 0.8)) + 1
+    return ' '.join(rng.choices(sentences, k=min(count, limit)))
+
+
+def make_placeholder_images(count, seed=0):
+    """Сохранить count однотонных картинок-заглушек и вернуть их имена."""
+    rng = random.Random(seed)
+    names = []
+    for num in range(count):
+        name = f'posts/placeholder-{num}.jpg'
+        if not default_storage.exists(name):
+            image = Image.new('RGB', PLACEHOLDER_SIZE, tuple(
+                rng.randrange(256) for _ in range(3)
+            ))
+            ImageDraw.Draw(image).text((20, 20), f'#{num}', fill='white')
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=70)
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+@contextmanager
+def explicit_pub_dates():
+    """Отключить auto_now_add, чтобы даты публикации были разными."""
+    fields = [model._meta.get_field('pub_date') for model in (Post, Comment)]
+    for pub_date in fields:
+        pub_date.auto_now_add = False
+    try:
+        yield
+    finally:
+        for pub_date in fields:
+            pub_date.auto_now_add = True
+
+
+def _users(plan, rng, sentences, start, count):
+    return User, (
+        User(
+            id=plan.first_user + num,
+            username=f'{USERNAME_PREFIX}{plan.first_user + num}',
+            password=UNUSABLE_PASSWORD_PREFIX,
+            first_name=rng.choice(sentences).split()[0],
+        )
+        for num in range(start, start + count)
+    )
+
+
+def _post_date(plan, index):
+    span = timedelta(days=plan.days)
+    return plan.started - span + span * (index + 0.5) / max(plan.posts, 1)
+
+
+def _posts(plan, rng, sentences, start, count):
+    def make(num):
+        image = None
+        if plan.images and rng.random() < plan.image_share:
+            image = rng.choice(plan.images)
+        post = Post(
+            id=plan.first_post + num,
+            text=text_of(rng, sentences, 3, 60),
+            author_id=plan.first_user + permute(
+                power_law_rank(rng, plan.users, plan.exponent),
+                plan.users, plan.seed,
+            ),
+            group_id=(
+                plan.first_group + rng.randrange(plan.groups)
+                if plan.groups and rng.random() < 0.7 else None
+            ),
+            image=image,
+            pub_date=_post_date(plan, num),
+        )
+        post.render_html()
+        return post
+    return Post, (make(num) for num in range(start, start + count))
+
+
+def _comments(plan, rng, sentences, start, count):
+    def make(num):
+        index = permute(
+            power_law_rank(rng, plan.posts, plan.exponent),
+            plan.posts, plan.seed,
+        )
+        pub_date = min(
+            plan.started,
+            _post_date(plan, index) + timedelta(
+                hours=rng.expovariate(1 / 12)
+            ),
+        )
+        comment = Comment(
+            id=plan.first_comment + num,
+            post_id=plan.first_post + index,
+            author_id=plan.first_user + rng.randrange(plan.users),
+            text=text_of(rng, sentences, 1, 10),
+            pub_date=pub_date,
+        )
+        comment.render_html()
+        return comment
+    return Comment, (make(num) for num in range(start, start + count))
+
+
+def _follows(plan, rng, sentences, start, count):
+    def make(num):
+        user_id = plan.first_user + num
+        wanted = round(plan.follows_per_user * rng.paretovariate(2) / 2)
+        wanted = max(1, min(wanted, plan.users - 1))
+        authors = set()
+        for _ in range(wanted * 2):
+            author_id = plan.first_user + permute(
+                power_law_rank(rng, plan.users, plan.exponent),
+                plan.users, plan.seed,
+            )
+            if author_id != user_id:
+                authors.add(author_id)
+            if len(authors) >= wanted:
+                break
+        return [Follow(user_id=user_id, author_id=author)
+                for author in authors]
+    return Follow, (
+        follow for num in range(start, start + count) for follow in make(num)
+    )
+
+
+BUILDERS = {
+    'users': _users,
+    'posts': _posts,
+    'comments': _comments,
+    'follows': _follows,
+}
+
+
+def totals(plan):
+    """Сколько единиц работы в каждой фазе, в порядке выполнения.
+
+    Для подписок единица — подписчик, а не строка Follow.
+    """
+    return [
+        ('users', plan.users),
+        ('posts', plan.posts),
+        ('comments', plan.comments if plan.posts else 0),
+        ('follows', plan.users if plan.users > 1 else 0),
+    ]
+
+
+def generate_chunk(plan, phase, start, count):
+    """Создать строки фазы с номерами [start, start + count).
+
+    Генератор случайных чисел зависит только от фазы и начала диапазона,
+    поэтому результат не зависит от числа процессов.
+    """
+    rng = random.Random(f'{plan.seed}:{phase}:{start}')
+    sentences = _sentences(plan.seed, SENTENCES)
+    model, objs = BUILDERS[phase](plan, rng, sentences, start, count)
+    objs = list(objs)
+    # SQLite пускает одного писателя: часть целиком пишется в одной
+    # транзакции и повторяется, если база занята другим процессом.
+    for attempt in range(CHUNK_RETRIES + 1):
+        try:
+            with explicit_pub_dates(), transaction.atomic():
+                bulk_create(model, objs)
+            return phase, len(objs)
+        except OperationalError:
+            if attempt == CHUNK_RETRIES:
+                raise
+            time.sleep(rng.uniform(0.1, 1.0) * (attempt + 1))
+
+
+def create_groups(plan):
+    bulk_create(Group, (
+        Group(
+            id=plan.first_group + num,
+            title=f'Группа {plan.first_group + num}',
+            slug=f'{USERNAME_PREFIX}-group-{plan.first_group + num}',
+            description=f'Сгенерированная группа {num}',
+        )
+        for num in range(plan.groups)
+    ))
+
+
+def finish():
+    """Сдвинуть последовательности id после вставок с явными id,
+    пересчитать популярность, сводки групп и индекс тегов и сбросить
+    версии ленты и sitemap: bulk_create не шлёт сигналов."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [User, Group, Post, Comment, Follow]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    rebuild(days=7)
+    rebuild_all()
+    reindex()
+    bump_versions(INDEX_SCOPE)
+    bump_all_shards()
@@ -0,0 +1,270 @@
+import random
+import threading
+import time
+import uuid
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, login
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpRequest
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+from core.stats import percentile
+from core.wsgi_client import call_wsgi
+from posts.models import Group, Post
+
+from .world import SMALL_GIF
+
+User = get_user_model()
+
+DEFAULT_MIX = {
+    'anonymous_index': 60,
+    'follow_feed': 25,
+    'comment': 10,
+    'upload': 5,
+}
+AUTH_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class Targets:
+    """Пользователи, посты и группы, по которым ходят сценарии."""
+
+    def __init__(self, users=100, posts=1000):
+        self.usernames = list(
+            User.objects.order_by('-pk').values_list('username', flat=True)
+            [:users]
+        )
+        self.post_ids = list(
+            Post.objects.values_list('pk', flat=True)[:posts]
+        )
+        self.group_ids = list(Group.objects.values_list('pk', flat=True))
+        if not self.usernames or not self.post_ids:
+            raise ValueError('В базе нет пользователей или постов.')
+        self.sessions = {}
+        for user in User.objects.filter(username__in=self.usernames):
+            self.sessions[user.username] = create_session(user)
+
+
+def create_session(user):
+    """Ключ сессии вошедшего пользователя, как в Client.force_login."""
+    engine = import_module(settings.SESSION_ENGINE)
+    request = HttpRequest()
+    request.session = engine.SessionStore()
+    login(request, user, AUTH_BACKEND)
+    request.session.save()
+    return request.session.session_key
+
+
+class Browser:
+    """Клиент с cookies поверх call_wsgi для одного виртуального
+    пользователя."""
+
+    def __init__(self, application, record):
+        self.application = application
+        self.record = record
+        self.cookies = {}
+
+    def request(self, step, url, method='GET', body=b'', headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            )
+        started = time.perf_counter()
+        try:
+            status, response_headers, content = call_wsgi(
+                self.application, url, method, body, headers
+            )
+        except Exception as error:
+            self.record(step, time.perf_counter() - started, None, error)
+            raise
+        self.record(step, time.perf_counter() - started, status, None)
+        for name, value in response_headers:
+            if name.lower() == 'set-cookie':
+                for morsel in SimpleCookie(value).values():
+                    self.cookies[morsel.key] = morsel.value
+        return status, content
+
+    def post_form(self, step, url, data):
+        data = {
+            **data,
+            'csrfmiddlewaretoken': self.cookies.get(
+                settings.CSRF_COOKIE_NAME, ''
+            ),
+        }
+        return self.request(
+            step, url, 'POST', urlencode(data).encode(),
+            {'Content-Type': 'application/x-www-form-urlencoded'},
+        )
+
+    def post_multipart(self, step, url, data):
+        data = {
+            **data,
+            'csrfmiddlewaretoken': self.cookies.get(
+                settings.CSRF_COOKIE_NAME, ''
+            ),
+        }
+        return self.request(
+            step, url, 'POST', encode_multipart(BOUNDARY, data),
+            {'Content-Type': MULTIPART_CONTENT},
+        )
+
+
+def anonymous_index(browser, targets, rng, think):
+    browser.request('index', reverse('posts:index'))
+    think()
+    browser.request('index_page', reverse('posts:index') + '?page=2')
+    think()
+    post_id = rng.choice(targets.post_ids)
+    browser.request(
+        'post_detail', reverse('posts:post_detail', args=[post_id])
+    )
+
+
+def _log_in(browser, targets, rng):
+    username = rng.choice(targets.usernames)
+    browser.cookies[settings.SESSION_COOKIE_NAME] = (
+        targets.sessions[username]
+    )
+    return username
+
+
+def follow_feed(browser, targets, rng, think):
+    _log_in(browser, targets, rng)
+    browser.request('follow_index', reverse('posts:follow_index'))
+    think()
+    username = rng.choice(targets.usernames)
+    browser.request('profile', reverse('posts:profile', args=[username]))
+
+
+def comment(browser, targets, rng, think):
+    _log_in(browser, targets, rng)
+    post_id = rng.choice(targets.post_ids)
+    browser.request(
+        'post_detail', reverse('posts:post_detail', args=[post_id])
+    )
+    think()
+    browser.post_form(
+        'add_comment',
+        reverse('posts:add_comment', args=[post_id]),
+        {'text': f'Нагрузочный комментарий {rng.random()}'},
+    )
+
+
+def upload(browser, targets, rng, think):
+    _log_in(browser, targets, rng)
+    browser.request('post_create_form', reverse('posts:post_create'))
+    think()
+    data = {
+        'text': 'Нагрузочный пост с картинкой',
+        'image': SimpleUploadedFile(
+            f'load-{uuid.uuid4().hex}.gif', SMALL_GIF, 'image/gif'
+        ),
+    }
+    if targets.group_ids:
+        data['group'] = rng.choice(targets.group_ids)
+    browser.post_multipart('post_create', reverse('posts:post_create'), data)
+
+
+JOURNEYS = {
+    'anonymous_index': anonymous_index,
+    'follow_feed': follow_feed,
+    'comment': comment,
+    'upload': upload,
+}
+
+
+class Recorder:
+    """Результаты шагов всех потоков: (шаг, секунды, код, ошибка)."""
+
+    def __init__(self):
+        self.rows = []
+        self.lock = threading.Lock()
+
+    def __call__(self, step, seconds, status, error):
+        with self.lock:
+            self.rows.append(
+                (step, seconds, status, repr(error) if error else None)
+            )
+
+
+def virtual_user(application, targets, mix, think_time, deadline, seed,
+                 record):
+    """Замкнутый цикл: сценарий, пауза, следующий сценарий."""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    def think():
+        if think_time:
+            time.sleep(rng.expovariate(1 / think_time))
+
+    while time.monotonic() < deadline:
+        browser = Browser(application, record)
+        journey = rng.choices(names, weights)[0]
+        try:
+            JOURNEYS[journey](browser, targets, rng, think)
+        except Exception:
+            # Ошибка уже записана в Browser.request, сценарий прерван.
+            pass
+        think()
+
+
+def run_load(application, targets, users, duration, mix=None,
+             think_time=1.0, seed=0):
+    """Прогнать users виртуальных пользователей в потоках duration секунд.
+
+    Возвращает строки Recorder и фактическую длительность прогона.
+    """
+    record = Recorder()
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    threads = [
+        threading.Thread(
+            target=virtual_user,
+            args=(application, targets, mix or DEFAULT_MIX, think_time,
+                  deadline, seed + num, record),
+        )
+        for num in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return record.rows, time.monotonic() - started
+
+
+def summarize(rows, elapsed):
+    """Пропускная способность, перцентили и доля ошибок по шагам."""
+    steps = {}
+    for step, seconds, status, error in rows:
+        steps.setdefault(step, []).append((seconds, status, error))
+    summary = {}
+    for step, samples in sorted(steps.items()):
+        latencies = sorted(seconds for seconds, _, _ in samples)
+        errors = sum(
+            1 for _, status, error in samples
+            if error or status is None or status >= 400
+        )
+        summary[step] = {
+            'requests': len(samples),
+            'rps': len(samples) / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'error_rate': errors / len(samples),
+        }
+    total_errors = sum(
+        1 for _, _, status, error in rows
+        if error or status is None or status >= 400
+    )
+    summary['total'] = {
+        'requests': len(rows),
+        'rps': len(rows) / elapsed,
+        'error_rate': total_errors / len(rows) if rows else 0.0,
+    }
+    return summary
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from benchmarks import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет расчёт рекомендаций «кого читать» на синтетическом '
+        'графе подписок заданного размера, без обращений к базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000)
+        parser.add_argument('--edges', type=int, default=10000000)
+        parser.add_argument('--top-k', type=int)
+        parser.add_argument('--block-size', type=int, default=2000)
+        parser.add_argument('--fanout', type=int)
+        parser.add_argument(
+            '--sample', type=int,
+            help='Считать только первых N пользователей и оценить полное '
+                 'время по скорости.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Записать JSON в файл.')
+
+    def handle(self, *args, **options):
+        result = suggestions.run(
+            options['users'], options['edges'],
+            top_k=options['top_k'],
+            block_size=options['block_size'],
+            fanout=options['fanout'],
+            sample=options['sample'],
+            seed=options['seed'],
+        )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(result, file, indent=2)
+        else:
+            self.stdout.write(json.dumps(result, indent=2))
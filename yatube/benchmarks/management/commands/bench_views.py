@@ -0,0 +1,82 @@
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import compare, run_scale
+from benchmarks.world import SCALES
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержку, число запросов и память страниц posts на '
+        'синтетических данных разного масштаба. Данные создаются во '
+        'временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', action='append', choices=sorted(SCALES),
+            help='Масштаб данных, можно указать несколько раз.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--view', action='append',
+            help='Измерять только эти страницы.',
+        )
+        parser.add_argument('--output', help='Записать JSON в файл.')
+        parser.add_argument(
+            '--compare', metavar='BASELINE',
+            help='Сравнить с ранее сохранённым JSON.',
+        )
+        parser.add_argument('--threshold', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        result = {
+            'commit': _commit(),
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'repeat': options['repeat'],
+            'scales': {},
+        }
+        for scale in options['scale'] or ['small']:
+            self.stderr.write(f'Масштаб {scale}...')
+            result['scales'][scale] = run_scale(
+                SCALES[scale], options['repeat'], options['view']
+            )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(result, file, indent=2)
+        else:
+            self.stdout.write(json.dumps(result, indent=2))
+        if options['compare']:
+            self.report(options['compare'], result, options['threshold'])
+
+    def report(self, path, result, threshold):
+        try:
+            with open(path) as file:
+                base = json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+        rows = compare(base, result, threshold)
+        for row in rows:
+            mark = ' РЕГРЕССИЯ' if row['regression'] else ''
+            self.stderr.write(
+                f"{row['scale']:7} {row['view']:18} {row['metric']:8} "
+                f"{row['base']:10.2f} -> {row['head']:10.2f} "
+                f"{row['change']:+7.1%}{mark}"
+            )
+        if any(row['regression'] for row in rows):
+            raise CommandError('Есть регрессии выше порога.')
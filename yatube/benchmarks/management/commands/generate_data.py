@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from benchmarks.generator import (Plan, create_groups, finish,
+                                  generate_chunk, make_placeholder_images,
+                                  next_ids, totals)
+
+
+def _generate(arguments):
+    return generate_chunk(*arguments)
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками. Фазы делятся на диапазоны id, '
+        'которые параллельно пишут несколько процессов через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument(
+            '--image-share', type=float, default=0.0,
+            help='Доля постов с картинкой-заглушкой.'
+        )
+        parser.add_argument('--image-variants', type=int, default=20)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикации.'
+        )
+        parser.add_argument('--processes', type=int, default=os.cpu_count())
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        plan = Plan(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows_per_user=options['follows_per_user'],
+            image_share=options['image_share'],
+            days=options['days'],
+            seed=options['seed'],
+            started=timezone.now(),
+            **next_ids(),
+        )
+        if plan.image_share:
+            plan.images = make_placeholder_images(
+                options['image_variants'], plan.seed
+            )
+        create_groups(plan)
+        # Дочерние процессы не должны делить соединение родителя.
+        connections.close_all()
+        pool = None
+        if options['processes'] > 1:
+            pool = multiprocessing.Pool(
+                options['processes'], initializer=django.setup
+            )
+        try:
+            for phase, total in totals(plan):
+                self.run_phase(pool, plan, phase, total, options)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        finish()
+
+    def run_phase(self, pool, plan, phase, total, options):
+        size = options['chunk_size']
+        chunks = [
+            (plan, phase, start, min(size, total - start))
+            for start in range(0, total, size)
+        ]
+        results = (
+            pool.imap_unordered(_generate, chunks) if pool
+            else map(_generate, chunks)
+        )
+        started = time.monotonic()
+        rows = 0
+        for done, (_, created) in enumerate(results, start=1):
+            rows += created
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'\r{phase}: {done}/{len(chunks)} частей, {rows} строк, '
+                f'{rows / elapsed if elapsed else 0:.0f} строк/с',
+                ending='',
+            )
+            self.stdout.flush()
+        self.stdout.write('')
@@ -0,0 +1,106 @@
+import json
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+
+from benchmarks.load import (DEFAULT_MIX, JOURNEYS, Targets, run_load,
+                             summarize)
+from yatube.wsgi import application
+
+
+def parse_mix(value):
+    """'anonymous_index=60,comment=10' -> {'anonymous_index': 60, ...}."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in JOURNEYS:
+            raise CommandError(
+                f'Неизвестный сценарий {name!r}, есть: '
+                f'{", ".join(JOURNEYS)}.'
+            )
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'Неверный вес сценария {name!r}.')
+    return mix
+
+
+def _run_in_process(targets, users, duration, mix, think_time, seed):
+    # debug_toolbar и журнал запросов при DEBUG искажают результат.
+    with override_settings(DEBUG=False):
+        rows, elapsed = run_load(
+            application, targets, users, duration, mix, think_time, seed
+        )
+    connections.close_all()
+    return rows, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: виртуальные пользователи в потоках и процессах '
+        'проходят сценарии против yatube.wsgi.application без сети. '
+        'Сценарии comment и upload пишут в базу и MEDIA_ROOT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Виртуальных пользователей в каждом процессе.'
+        )
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--duration', type=float, default=30.0)
+        parser.add_argument(
+            '--think-time', type=float, default=1.0,
+            help='Средняя пауза между шагами, секунды.'
+        )
+        parser.add_argument(
+            '--mix', type=parse_mix, default=DEFAULT_MIX,
+            help='Веса сценариев: ' + ','.join(
+                f'{name}={weight}' for name, weight in DEFAULT_MIX.items()
+            )
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Записать JSON в файл.')
+
+    def handle(self, *args, **options):
+        try:
+            targets = Targets()
+        except ValueError as error:
+            raise CommandError(error)
+        arguments = [
+            (targets, options['users'], options['duration'],
+             options['mix'], options['think_time'],
+             options['seed'] + num * options['users'])
+            for num in range(options['processes'])
+        ]
+        if options['processes'] == 1:
+            results = [_run_in_process(*arguments[0])]
+        else:
+            # Дочерние процессы не должны делить соединение родителя.
+            connections.close_all()
+            with multiprocessing.Pool(options['processes']) as pool:
+                results = pool.starmap(_run_in_process, arguments)
+        rows = [row for process_rows, _ in results for row in process_rows]
+        elapsed = max(elapsed for _, elapsed in results)
+        summary = summarize(rows, elapsed)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(summary, file, indent=2)
+        self.report(summary)
+
+    def report(self, summary):
+        total = summary.pop('total')
+        for step, row in summary.items():
+            self.stdout.write(
+                f"{step:18} {row['requests']:7d} {row['rps']:8.1f} rps "
+                f"p50 {row['p50_ms']:8.1f} p95 {row['p95_ms']:8.1f} "
+                f"p99 {row['p99_ms']:8.1f} мс "
+                f"ошибок {row['error_rate']:6.1%}"
+            )
+        self.stdout.write(
+            f"{'всего':18} {total['requests']:7d} {total['rps']:8.1f} rps "
+            f"ошибок {total['error_rate']:6.1%}"
+        )
@@ -0,0 +1,141 @@
+import tempfile
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.stats import percentile
+
+from .world import build_world
+
+
+def view_cases(world):
+    """(имя, url, пользователь или None) для каждой страницы posts."""
+    popular = world.popular[0]
+    follower = world.followers[0]
+    cases = [
+        ('index', reverse('posts:index'), None),
+        ('index_page_5', reverse('posts:index') + '?page=5', None),
+        ('profile', reverse('posts:profile', args=[popular.username]),
+         None),
+        ('profile_logged_in',
+         reverse('posts:profile', args=[popular.username]), follower),
+        ('post_detail',
+         reverse('posts:post_detail', args=[world.post_ids[0]]), None),
+        ('follow_index', reverse('posts:follow_index'), follower),
+        ('popular', reverse('posts:popular'), None),
+        ('group_index', reverse('posts:group_index'), None),
+    ]
+    if world.groups:
+        cases.append((
+            'group_list',
+            reverse('posts:group_list', args=[world.groups[0].slug]),
+            None,
+        ))
+    return cases
+
+
+class QueryCounter:
+    """Считает запросы обёрткой execute: queries_log сбрасывается в
+    начале каждого запроса и для этого не годится."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, url, repeat):
+    """Задержки, число запросов к базе и пик выделенной памяти."""
+    cache.clear()
+    started = time.perf_counter()
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        response = client.get(url)
+    cold = time.perf_counter() - started
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.get(url)
+        latencies.append(time.perf_counter() - started)
+    cache.clear()
+    tracemalloc.start()
+    try:
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    latencies.sort()
+    return {
+        'status': response.status_code,
+        'cold_ms': cold * 1000,
+        'min_ms': latencies[0] * 1000,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'queries': counter.count,
+        'peak_kb': peak / 1024,
+    }
+
+
+def run_scale(params, repeat, only=None):
+    """Построить мир, измерить страницы и откатить все изменения.
+
+    DEBUG выключен, чтобы не мерить debug_toolbar и журнал запросов;
+    картинки и миниатюры пишутся во временный MEDIA_ROOT.
+    """
+    with tempfile.TemporaryDirectory() as media_root:
+        with override_settings(DEBUG=False, MEDIA_ROOT=media_root):
+            return _run_scale(params, repeat, only)
+
+
+def _run_scale(params, repeat, only):
+    with transaction.atomic():
+        started = time.perf_counter()
+        world = build_world(**params)
+        results = {'build_seconds': time.perf_counter() - started}
+        clients = {}
+        for name, url, user in view_cases(world):
+            if only and name not in only:
+                continue
+            if user not in clients:
+                clients[user] = Client()
+                if user is not None:
+                    clients[user].force_login(user)
+            results[name] = measure(clients[user], url, repeat)
+        transaction.set_rollback(True)
+    cache.clear()
+    return results
+
+
+def compare(base, head, threshold=0.1):
+    """Строки (масштаб, страница, метрика, было, стало, изменение).
+
+    Изменение — доля относительно base; строки сравниваются только для
+    масштабов и страниц, которые есть в обоих результатах.
+    """
+    rows = []
+    for scale, views in head['scales'].items():
+        for view, metrics in views.items():
+            old = base['scales'].get(scale, {}).get(view)
+            if not isinstance(metrics, dict) or not old:
+                continue
+            for metric in ('p50_ms', 'p95_ms', 'queries', 'peak_kb'):
+                before, after = old[metric], metrics[metric]
+                change = (after - before) / before if before else 0.0
+                rows.append({
+                    'scale': scale,
+                    'view': view,
+                    'metric': metric,
+                    'base': before,
+                    'head': after,
+                    'change': change,
+                    'regression': change > threshold,
+                })
+    return rows
@@ -0,0 +1,76 @@
+"""Замер расчёта рекомендаций на синтетическом графе без базы.
+
+Граф строится сразу в массивах NumPy: исходящие степени — Парето,
+авторы выбираются по степенному закону, как в генераторе данных.
+Так измеряется сам движок на миллионах рёбер, без выгрузки из Follow.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+from django.conf import settings
+
+from posts.suggestions import FollowGraph, iter_suggestions
+
+
+def synthetic_edges(users, edges, exponent=1.1, seed=0):
+    """Пары (подписчик, автор) без петель и повторов, около edges штук."""
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, users + 1) ** exponent
+    authors = rng.choice(users, size=edges, p=weights / weights.sum())
+    out_degree = rng.pareto(2, size=users) + 1
+    followers = rng.choice(
+        users, size=edges, p=out_degree / out_degree.sum()
+    )
+    pairs = np.unique(followers * users + authors)
+    followers, authors = pairs // users, pairs % users
+    loops = followers == authors
+    return followers[~loops], authors[~loops]
+
+
+def run(users, edges, top_k=None, block_size=2000, fanout=None,
+        sample=None, seed=0):
+    """Время и пик памяти построения CSR и расчёта по пачкам.
+
+    sample ограничивает число пачек: скорость в пользователях в секунду
+    переносится на весь граф в поле estimated_total_s.
+    """
+    top_k = top_k or settings.SUGGESTIONS_TOP_K
+    fanout = fanout or settings.SUGGESTIONS_FANOUT
+    followers, authors = synthetic_edges(users, edges, seed=seed)
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        graph = FollowGraph.from_edges(followers, authors, seed)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        computed = suggestions = 0
+        blocks = iter_suggestions(
+            graph, top_k, block_size, settings.SUGGESTIONS_WEIGHTS, fanout
+        )
+        for _, (owners, *_) in blocks:
+            computed += block_size
+            suggestions += len(owners)
+            if sample and computed >= sample:
+                break
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    computed = min(computed, graph.size)
+    rate = computed / elapsed if elapsed else None
+    return {
+        'users': graph.size,
+        'edges': graph.edges,
+        'top_k': top_k,
+        'fanout': fanout,
+        'block_size': block_size,
+        'build_s': round(build, 3),
+        'computed_users': computed,
+        'suggestions': suggestions,
+        'compute_s': round(elapsed, 3),
+        'users_per_s': rate and round(rate),
+        'estimated_total_s': rate and round(graph.size / rate, 1),
+        'peak_mb': round(peak / 2 ** 20, 1),
+    }
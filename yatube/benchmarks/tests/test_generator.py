@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Max
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, PostScore, PostTag
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDataTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def generate(self):
+        call_command(
+            'generate_data', users=50, groups=3, posts=200, comments=300,
+            follows_per_user=5, image_share=0.5, image_variants=2,
+            processes=1, chunk_size=64, stdout=StringIO(),
+        )
+
+    def test_rows_are_created_in_chunks(self):
+        User.objects.create_user(username='existing')
+        self.generate()
+        self.assertEqual(User.objects.count(), 51)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertGreaterEqual(Follow.objects.count(), 50)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertTrue(Post.objects.filter(image='').exists())
+        self.assertTrue(PostScore.objects.exists())
+        self.assertTrue(PostTag.objects.exists())
+
+    def test_dates_are_spread_and_auto_now_restored(self):
+        """Даты публикации разнесены, а обычное создание постов не
+        сломано явными id и отключённым auto_now_add."""
+        self.generate()
+        oldest = Post.objects.last().pub_date
+        self.assertLess(oldest, timezone.now() - timedelta(days=300))
+        top = Post.objects.aggregate(top=Max('pk'))['top']
+        post = Post.objects.create(
+            text='Новый', author=User.objects.create_user(username='new')
+        )
+        self.assertEqual(post.pk, top + 1)
+        self.assertGreater(post.pub_date, timezone.now() - timedelta(1))
@@ -0,0 +1,38 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import Comment, Post
+from yatube.wsgi import application
+from ..load import JOURNEYS, Targets, run_load, summarize
+from ..world import build_world
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, DEBUG=False)
+class LoadTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_every_journey_succeeds(self):
+        """Все сценарии проходят без ошибок, включая CSRF-формы."""
+        build_world(users=10, groups=2, posts=30, comments=10)
+        posts_before = Post.objects.count()
+        rows, elapsed = run_load(
+            application, Targets(), users=2, duration=1,
+            mix={name: 1 for name in JOURNEYS}, think_time=0,
+        )
+        summary = summarize(rows, elapsed)
+        self.assertGreater(summary['total']['requests'], 0)
+        self.assertEqual(summary['total']['error_rate'], 0)
+        self.assertIn('add_comment', summary)
+        self.assertIn('post_create', summary)
+        self.assertTrue(
+            Comment.objects.filter(text__startswith='Нагрузочный').exists()
+        )
+        self.assertGreater(Post.objects.count(), posts_before)
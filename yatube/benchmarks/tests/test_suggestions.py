@@ -0,0 +1,27 @@
+import json
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..suggestions import synthetic_edges
+
+
+class BenchSuggestionsTests(SimpleTestCase):
+    def test_synthetic_edges_have_no_loops_or_duplicates(self):
+        followers, authors = synthetic_edges(100, 1000)
+        self.assertFalse((followers == authors).any())
+        pairs = followers * 100 + authors
+        self.assertEqual(len(pairs), len(np.unique(pairs)))
+
+    def test_command_reports_rate(self):
+        out = StringIO()
+        call_command(
+            'bench_suggestions', users=500, edges=5000, block_size=100,
+            sample=200, stdout=out,
+        )
+        result = json.loads(out.getvalue())
+        self.assertEqual(result['computed_users'], 200)
+        self.assertGreater(result['suggestions'], 0)
+        self.assertIsNotNone(result['estimated_total_s'])
@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Follow, Post, PostTag
+from ..runner import compare, run_scale
+from ..world import build_world
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WorldTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_world_sizes(self):
+        world = build_world(users=40, groups=3, posts=200, comments=300)
+        self.assertEqual(len(world.users), 40)
+        self.assertEqual(len(world.groups), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertTrue(PostTag.objects.exists())
+
+    def test_follow_degrees_are_skewed(self):
+        """Немногие авторы собирают большую часть подписчиков."""
+        build_world(users=200, groups=1, posts=10, comments=0)
+        degrees = sorted(Counter(
+            Follow.objects.values_list('author_id', flat=True)
+        ).values(), reverse=True)
+        top = sum(degrees[:len(degrees) // 10])
+        self.assertGreater(top, sum(degrees) / 3)
+        self.assertFalse(
+            Follow.objects.filter(user_id=F('author_id')).exists()
+        )
+
+    def test_run_scale_measures_and_rolls_back(self):
+        params = dict(users=20, groups=2, posts=50, comments=50)
+        results = run_scale(params, repeat=2)
+        self.assertEqual(Post.objects.count(), 0)
+        self.assertEqual(results['index']['status'], 200)
+        self.assertEqual(results['follow_index']['status'], 200)
+        self.assertGreater(results['post_detail']['queries'], 0)
+        self.assertGreater(results['profile']['peak_kb'], 0)
+
+    def test_compare_flags_regressions(self):
+        base = {'scales': {'small': {'index': {
+            'p50_ms': 10, 'p95_ms': 20, 'queries': 4, 'peak_kb': 100,
+        }}}}
+        head = {'scales': {'small': {'build_seconds': 1, 'index': {
+            'p50_ms': 10, 'p95_ms': 30, 'queries': 4, 'peak_kb': 100,
+        }}}}
+        rows = compare(base, head)
+        regressions = [row['metric'] for row in rows if row['regression']]
+        self.assertEqual(regressions, ['p95_ms'])
@@ -0,0 +1,205 @@
+import random
+from itertools import accumulate
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from faker import Faker
+
+from posts.group_stats import rebuild_all as rebuild_group_stats
+from posts.models import Comment, Follow, Group, Post
+from posts.popularity import rebuild as rebuild_scores
+from posts.rendering import backfill as backfill_html
+from posts.tagging import reindex as reindex_tags
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+SCALES = {
+    'small': dict(users=50, groups=5, posts=500, comments=1000),
+    'medium': dict(users=500, groups=20, posts=5000, comments=10000),
+    'large': dict(users=2000, groups=50, posts=50000, comments=100000),
+}
+BATCH_SIZE = 1000
+USERNAME_PREFIX = 'bench_'
+
+
+def bulk_create(model, objs):
+    """bulk_create пачками не больше лимита параметров СУБД."""
+    batch_size = BATCH_SIZE
+    max_params = connection.features.max_query_params
+    if max_params:
+        batch_size = min(
+            batch_size, max_params // len(model._meta.concrete_fields)
+        )
+    model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def sentence_pool(seed, size=200, tags=20):
+    """Готовые предложения Faker: собирать из них тексты намного
+    быстрее, чем генерировать каждый текст заново. Каждое пятое
+    предложение с хештегом, чтобы у лент тегов были посты."""
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    return [
+        fake.sentence(nb_words=10) + (f' #тема{num % tags}' * (num % 5 == 0))
+        for num in range(size)
+    ]
+
+
+@dataclass
+class World:
+    """Созданный мир и ключи для обращения к его страницам."""
+    users: list
+    groups: list
+    post_ids: list
+    popular: list = field(default_factory=list)
+    followers: list = field(default_factory=list)
+
+
+def power_law_weights(count, exponent):
+    """Накопленные веса 1/rank**exponent для random.choices.
+
+    Немногие первые элементы получают большую часть связей.
+    """
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def _sample_unique(rng, population, cum_weights, count):
+    chosen = set()
+    for _ in range(4):
+        chosen.update(rng.choices(
+            population, cum_weights=cum_weights, k=count - len(chosen)
+        ))
+        if len(chosen) >= count:
+            break
+    return chosen
+
+
+def build_follows(rng, user_ids, average, exponent):
+    """Пары (подписчик, автор) со степенным распределением подписчиков.
+
+    Число подписок у пользователя тоже степенное: большинство подписано
+    на нескольких авторов, немногие — на сотни.
+    """
+    authors = list(user_ids)
+    rng.shuffle(authors)
+    weights = power_law_weights(len(authors), exponent)
+    total_weight = weights[-1] if weights else 1
+    pairs = []
+    for rank, user_id in enumerate(user_ids, start=1):
+        wanted = round(
+            average * len(user_ids) / rank ** exponent / total_weight
+        )
+        wanted = max(1, min(wanted, len(authors) - 1))
+        for author_id in _sample_unique(rng, authors, weights, wanted):
+            if author_id != user_id:
+                pairs.append((user_id, author_id))
+    return pairs, authors[:10]
+
+
+def build_world(users, groups, posts, comments, image_share=0.2,
+                follows_per_user=10, exponent=1.1, seed=0):
+    """Наполнить базу синтетическими данными через bulk_create."""
+    rng = random.Random(seed)
+    sentences = sentence_pool(seed)
+
+    def text(sentences_count):
+        return ' '.join(rng.choices(sentences, k=sentences_count))
+
+    image = 'posts/bench.gif'
+    if not default_storage.exists(image):
+        image = default_storage.save(image, ContentFile(SMALL_GIF))
+    bulk_create(
+        User,
+        (User(username=f'{USERNAME_PREFIX}{num}') for num in range(users)),
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=USERNAME_PREFIX)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    bulk_create(
+        Group,
+        (
+            Group(
+                title=f'Группа {num}',
+                slug=f'{USERNAME_PREFIX}group-{num}',
+                description=rng.choice(sentences),
+            )
+            for num in range(groups)
+        ),
+    )
+    group_ids = list(
+        Group.objects.filter(slug__startswith=f'{USERNAME_PREFIX}group-')
+        .values_list('pk', flat=True)
+    )
+    author_weights = power_law_weights(len(user_ids), exponent)
+    bulk_create(
+        Post,
+        (
+            Post(
+                text=text(rng.randint(1, 5)),
+                author_id=rng.choices(
+                    user_ids, cum_weights=author_weights
+                )[0],
+                group_id=(
+                    rng.choice(group_ids)
+                    if group_ids and rng.random() < 0.7 else None
+                ),
+                image=image if rng.random() < image_share else None,
+            )
+            for _ in range(posts)
+        ),
+    )
+    post_ids = list(
+        Post.objects.filter(author_id__in=user_ids)
+        .values_list('pk', flat=True)
+    )
+    post_weights = power_law_weights(len(post_ids), exponent)
+    bulk_create(
+        Comment,
+        (
+            Comment(
+                post_id=rng.choices(
+                    post_ids, cum_weights=post_weights
+                )[0],
+                author_id=rng.choice(user_ids),
+                text=text(1),
+            )
+            for _ in range(comments if post_ids else 0)
+        ),
+    )
+    pairs, popular = build_follows(
+        rng, user_ids, follows_per_user, exponent
+    )
+    bulk_create(
+        Follow,
+        (Follow(user_id=user, author_id=author) for user, author in pairs),
+    )
+    # bulk_create не шлёт сигналов и не зовёт save(): сводки, готовый
+    # HTML и индекс тегов считаются заново, как после команд
+    # render_html и reindex_tags.
+    rebuild_scores(days=1)
+    rebuild_group_stats()
+    backfill_html(Post)
+    backfill_html(Comment)
+    reindex_tags()
+    by_id = User.objects.in_bulk(user_ids)
+    return World(
+        users=[by_id[pk] for pk in user_ids],
+        groups=list(Group.objects.filter(pk__in=group_ids)),
+        post_ids=post_ids,
+        popular=[by_id[pk] for pk in popular],
+        followers=[by_id[pk] for pk in user_ids[:10]],
+    )
@@ -0,0 +1,151 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .wsgi_client import make_environ, start_wsgi
+
+# Ключ environ: запрос пришёл через ASGI, долгие потоки не держат поток.
+ASYNC_STREAMS = 'yatube.async_streams'
+
+
+def serves_async_streams(request):
+    """Можно ли отдавать этому запросу долгий поток (SSE).
+
+    Под WSGI каждое открытое соединение занимает поток обработчика,
+    поэтому такие потоки отдаются только через WsgiToAsgi.
+    """
+    return bool(request.META.get(ASYNC_STREAMS))
+
+
+class WsgiToAsgi:
+    """ASGI-приложение поверх синхронного WSGI-приложения Django.
+
+    Соединения обслуживает цикл событий, а представления выполняются
+    в ограниченном пуле потоков: медленный клиент не занимает поток,
+    пока присылает тело запроса или читает ответ. Потоковый ответ с
+    атрибутом async_stream (асинхронный генератор) отдаётся прямо из
+    цикла событий, так что долгие соединения не держат потоки.
+
+    Функции on_startup получают WSGI-приложение, когда сервер
+    сообщает о запуске (lifespan.startup).
+    """
+
+    def __init__(self, wsgi_application, max_workers, on_startup=()):
+        self.wsgi_application = wsgi_application
+        self.on_startup = list(on_startup)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+        body = await self.read_body(receive)
+        headers = {}
+        for name, value in scope['headers']:
+            name = name.decode('latin1')
+            value = value.decode('latin1')
+            if name in headers:
+                value = f'{headers[name]},{value}'
+            headers[name] = value
+        environ = make_environ(
+            scope['method'],
+            scope['path'].encode('utf8').decode('latin1'),
+            scope['query_string'].decode('latin1'),
+            body,
+            headers,
+            server=scope.get('server') or ('localhost', 80),
+            client=scope.get('client') or ('127.0.0.1', 0),
+            scheme=scope.get('scheme', 'http'),
+        )
+        environ['SCRIPT_NAME'] = scope.get('root_path', '')
+        environ[ASYNC_STREAMS] = True
+        await self.respond(environ, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                for hook in self.on_startup:
+                    hook(self.wsgi_application)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    def run_wsgi(self, environ):
+        """Обычный ответ читается и закрывается в потоке представления."""
+        status, headers, result = start_wsgi(self.wsgi_application, environ)
+        if getattr(result, 'streaming', False):
+            return status, headers, None, result
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return status, headers, content, None
+
+    async def respond(self, environ, send):
+        loop = asyncio.get_running_loop()
+        status, headers, content, result = await loop.run_in_executor(
+            self.executor, self.run_wsgi, environ
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ],
+        })
+        if result is None:
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        async_stream = getattr(result, 'async_stream', None)
+        if async_stream is not None:
+            await self.send_async_stream(async_stream, result, send)
+            return
+        chunks = iter(result)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    self.executor, next, chunks, None
+                )
+                if chunk is None:
+                    break
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, result.close)
+
+    async def send_async_stream(self, async_stream, result, send):
+        """Ответ с async_stream отдаётся циклом событий, без потока."""
+        try:
+            async for chunk in async_stream():
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, result.close
+            )
@@ -0,0 +1,43 @@
+import re
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_MISSING = object()
+# Наши ключи делят части двоеточием, sorl-thumbnail — «||».
+_SEPARATOR_RE = re.compile(r':|\|\|')
+
+
+def _prefix(key):
+    """Префикс ключа для метки; ключ без разделителя — other.
+
+    Метка не должна зависеть от хеша или id в ключе, иначе число рядов
+    метрики растёт вместе с числом ключей.
+    """
+    parts = _SEPARATOR_RE.split(str(key), 1)
+    return parts[0] if len(parts) > 1 else 'other'
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache, считающий попадания и промахи по префиксу ключа."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        metrics.registry.inc('yatube_cache_requests_total', {
+            'prefix': _prefix(key),
+            'result': 'miss' if value is _MISSING else 'hit',
+        })
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        for key in keys:
+            value = super().get(key, _MISSING, version)
+            metrics.registry.inc('yatube_cache_requests_total', {
+                'prefix': _prefix(key),
+                'result': 'miss' if value is _MISSING else 'hit',
+            })
+            if value is not _MISSING:
+                found[key] = value
+        return found
@@ -0,0 +1,73 @@
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+
+LOCK_SUFFIX = ':lock'
+POLL_INTERVAL = 0.05
+
+
+def _recompute(key, compute, timeout, stale_timeout):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    entry = (value, delta, time.time() + timeout)
+    cache.set(key, entry, timeout + stale_timeout)
+    return value
+
+
+def _should_refresh(delta, expires, beta):
+    """Вероятностное досрочное обновление (алгоритм XFetch).
+
+    Чем ближе срок истечения и чем дольше пересчёт, тем вероятнее, что
+    один из запросов обновит значение заранее, до массового промаха.
+    """
+    jitter = -delta * beta * math.log(1 - random.random())
+    return time.time() + jitter >= expires
+
+
+def _release(lock_key, token):
+    """Снять блокировку, только если она всё ещё наша.
+
+    Если пересчёт шёл дольше lock_timeout, блокировка уже истекла и её
+    мог взять другой процесс: удалять её нельзя. API кэша Django не даёт
+    атомарного «сравнить и удалить», поэтому между чтением и удалением
+    остаётся короткое окно, но не весь срок чужого пересчёта.
+    """
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=None, beta=1.0,
+                   lock_timeout=10):
+    """Вернуть значение из кэша, пересчитывая его в одном запросе.
+
+    Пока один запрос держит блокировку и пересчитывает значение,
+    остальные получают устаревшее значение, а при пустом кэше ждут
+    результата не дольше lock_timeout секунд.
+    """
+    if stale_timeout is None:
+        stale_timeout = timeout
+    lock_key = key + LOCK_SUFFIX
+    token = uuid.uuid4().hex
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        if not _should_refresh(delta, expires, beta):
+            return value
+        if not cache.add(lock_key, token, lock_timeout):
+            return value
+    elif not cache.add(lock_key, token, lock_timeout):
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        return _recompute(key, compute, timeout, stale_timeout)
+    try:
+        return _recompute(key, compute, timeout, stale_timeout)
+    finally:
+        _release(lock_key, token)
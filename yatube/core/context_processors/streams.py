@@ -0,0 +1,8 @@
+from core.asgi_adapter import serves_async_streams
+
+
+def async_streams(request):
+    """Включает уведомления о новых постах только при запуске под ASGI."""
+    return {
+        'async_streams': serves_async_streams(request)
+    }
@@ -0,0 +1,137 @@
+import base64
+import json
+import uuid
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import Count, Q
+
+from tasks.models import Task
+from tasks.registry import task
+
+from .models import SpooledEmail
+from .stats import percentile
+
+
+def _attachment(attachment):
+    filename, content, mimetype = attachment
+    if isinstance(content, bytes):
+        return [filename, base64.b64encode(content).decode(), mimetype, True]
+    return [filename, content, mimetype, False]
+
+
+def message_to_json(message):
+    """Письмо в JSON из обычных полей, без pickle.
+
+    Вложения-объекты MIMEBase не поддерживаются: их нельзя разобрать
+    обратно в поля письма.
+    """
+    if any(not isinstance(item, tuple) for item in message.attachments):
+        raise ValueError('Вложения MIMEBase нельзя положить в очередь')
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'content_subtype': message.content_subtype,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': [_attachment(item) for item in message.attachments],
+    })
+
+
+def message_from_json(data):
+    fields = json.loads(data)
+    attachments = [
+        (filename, base64.b64decode(content) if encoded else content,
+         mimetype)
+        for filename, content, mimetype, encoded in fields.pop('attachments')
+    ]
+    content_subtype = fields.pop('content_subtype')
+    alternatives = [tuple(item) for item in fields.pop('alternatives')]
+    message = EmailMultiAlternatives(
+        attachments=attachments, alternatives=alternatives, **fields
+    )
+    message.content_subtype = content_subtype
+    return message
+
+
+class SpoolEmailBackend(BaseEmailBackend):
+    """Складывает письма в базу и ставит их отправку в очередь задач.
+
+    Письма одного вызова уходят одной задачей через одно соединение,
+    большие вызовы режутся на пачки по EMAIL_SPOOL_BATCH писем.
+    Повторы с задержкой и видимость захваченной задачи берёт на себя
+    очередь задач.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [message_to_json(message) for message in email_messages]
+        batch_size = settings.EMAIL_SPOOL_BATCH
+        with transaction.atomic():
+            for start in range(0, len(rows), batch_size):
+                batch = uuid.uuid4().hex
+                queued = deliver_emails.enqueue(
+                    batch, idempotency_key=f'email:{batch}'
+                )
+                SpooledEmail.objects.bulk_create(
+                    SpooledEmail(message=message, task=queued)
+                    for message in rows[start:start + batch_size]
+                )
+        return len(rows)
+
+
+@task
+def deliver_emails(batch):
+    """Отправить письма пачки через одно соединение EMAIL_SPOOL_BACKEND.
+
+    При повторе задачи уже отправленные письма пропускаются; первое
+    же неотправленное роняет задачу, и очередь повторит её позже.
+    """
+    emails = SpooledEmail.objects.filter(
+        task__idempotency_key=f'email:{batch}', sent__isnull=True
+    ).order_by('pk')
+    connection = get_connection(settings.EMAIL_SPOOL_BACKEND)
+    connection.open()
+    try:
+        for email in emails:
+            connection.send_messages([message_from_json(email.message)])
+            email.mark_sent()
+    finally:
+        connection.close()
+
+
+def spool_stats(window=1000):
+    """Глубина очереди писем и задержка доставки, секунды.
+
+    Письмо в очереди, пока его задача ждёт или выполняется, и ошибочное,
+    если задача исчерпала попытки.
+    """
+    unsent = Q(sent__isnull=True)
+    stats = SpooledEmail.objects.aggregate(
+        queued=Count('pk', filter=unsent & Q(
+            task__status__in=(Task.PENDING, Task.RUNNING)
+        )),
+        failed=Count('pk', filter=unsent & Q(task__status=Task.FAILED)),
+        sent=Count('pk', filter=Q(sent__isnull=False)),
+    )
+    delivered = (
+        SpooledEmail.objects.filter(sent__isnull=False)
+        .order_by('-sent')
+        .values_list('created', 'sent')[:window]
+    )
+    latencies = sorted(
+        (sent - created).total_seconds() for created, sent in delivered
+    )
+    if latencies:
+        stats.update(
+            latency_avg=sum(latencies) / len(latencies),
+            latency_p50=percentile(latencies, 50),
+            latency_p95=percentile(latencies, 95),
+        )
+    return stats
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.asgi_adapter import WsgiToAsgi
+from core.stats import percentile
+from core.wsgi_client import call_wsgi
+from yatube.wsgi import application as wsgi_application
+
+
+def _summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+    }
+
+
+def bench_wsgi(url, requests, concurrency):
+    def fetch(_):
+        started = time.monotonic()
+        call_wsgi(wsgi_application, url)
+        return time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(fetch, range(requests)))
+    return _summary(latencies, time.monotonic() - started)
+
+
+async def _bench_asgi(url, requests, concurrency):
+    asgi_application = WsgiToAsgi(wsgi_application, concurrency)
+    path, _, query = url.partition('?')
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch():
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query.encode(),
+            'headers': [(b'host', b'localhost')],
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            pass
+
+        async with semaphore:
+            started = time.monotonic()
+            await asgi_application(scope, receive, send)
+            return time.monotonic() - started
+
+    started = time.monotonic()
+    latencies = await asyncio.gather(*(fetch() for _ in range(requests)))
+    asgi_application.executor.shutdown()
+    return _summary(latencies, time.monotonic() - started)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и p99 задержки WSGI и ASGI '
+        'точек входа при одинаковой конкурентности, без сети.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        arguments = (
+            options['url'], options['requests'], options['concurrency']
+        )
+        results = {
+            'WSGI': bench_wsgi(*arguments),
+            'ASGI': asyncio.run(_bench_asgi(*arguments)),
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: {result["rps"]:8.1f} rps, '
+                f'p50 {result["p50"]:7.2f} мс, p99 {result["p99"]:7.2f} мс'
+            )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core import slow_queries
+from core.wsgi_client import call_wsgi
+from yatube.wsgi import application
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает страницы в текущем процессе с включённым журналом '
+        'медленных запросов и печатает самые дорогие формы запросов с '
+        'планами и местами вызова.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument(
+            '--threshold-ms', type=float, default=0,
+            help='Порог медленного запроса, мс.'
+        )
+        parser.add_argument('--repeat-threshold', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        slow_queries.shapes.clear()
+        with override_settings(
+            DEBUG=False,
+            SLOW_QUERY_SAMPLE_RATE=1,
+            SLOW_QUERY_THRESHOLD_MS=options['threshold_ms'],
+            SLOW_QUERY_REPEAT_THRESHOLD=options['repeat_threshold'],
+        ):
+            for url in options['urls']:
+                status, _, _ = call_wsgi(application, url)
+                self.stdout.write(f'{status} {url}')
+        for entry in slow_queries.report(options['limit']):
+            self.stdout.write(
+                f"\n{entry['id']}: {entry['count']} раз, "
+                f"всего {entry['total_seconds'] * 1000:.1f} мс, "
+                f"максимум {entry['max_seconds'] * 1000:.1f} мс, "
+                f"{', '.join(entry['views'])}"
+            )
+            self.stdout.write(f"  {entry['shape']}")
+            for site, template in entry['sites']:
+                self.stdout.write(f'  из {site}, шаблон {template}')
+            if entry['plan']:
+                for line in entry['plan'].splitlines():
+                    self.stdout.write(f'  план: {line}')
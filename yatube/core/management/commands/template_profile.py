@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core import template_profiler
+from core.wsgi_client import call_wsgi
+from yatube.wsgi import application
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает страницы в текущем процессе с профилированием шаблонов '
+        'и печатает время по шаблонам, тегам и фильтрам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        template_profiler.totals.clear()
+        with override_settings(DEBUG=False, TEMPLATE_PROFILING=True):
+            for url in options['urls']:
+                for _ in range(options['repeat']):
+                    status, _, _ = call_wsgi(application, url)
+                self.stdout.write(f'{status} {url}')
+        self.stdout.write(
+            f"\n{'шаблон, тег или фильтр':40} {'вызовы':>8} "
+            f"{'всего, мс':>10} {'своё, мс':>10}"
+        )
+        for name, calls, total, own in template_profiler.report(
+            options['limit']
+        ):
+            self.stdout.write(
+                f'{name:40} {calls:8d} {total * 1000:10.1f} '
+                f'{own * 1000:10.1f}'
+            )
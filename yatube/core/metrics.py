@@ -0,0 +1,203 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 5120, 10240, 51200, 102400, 512000, 1048576)
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': LATENCY_BUCKETS,
+    'yatube_db_queries': QUERY_COUNT_BUCKETS,
+    'yatube_db_query_duration_seconds': LATENCY_BUCKETS,
+    'yatube_template_render_seconds': LATENCY_BUCKETS,
+    'yatube_response_bytes': SIZE_BUCKETS,
+}
+
+
+class Registry:
+    """Счётчики и гистограммы процесса без блокировок на запись.
+
+    У каждого потока свой шард, который меняет только он сам. Чтение
+    копирует шарды всех потоков и складывает их.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """Записать наблюдение: [число, сумма, счётчики корзин...]."""
+        key = (name, tuple(sorted(labels.items())))
+        shard = self._shard()
+        buckets = HISTOGRAMS[name]
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0, 0.0] + [0] * len(buckets)
+        state[0] += 1
+        state[1] += value
+        for position, bound in enumerate(buckets):
+            if value <= bound:
+                state[2 + position] += 1
+                break
+
+    def snapshot(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                _merge(merged, key, value)
+        return merged
+
+    def clear(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+def _merge(merged, key, value):
+    if isinstance(value, list):
+        value = list(value)
+        current = merged.get(key)
+        if current is not None:
+            value = [a + b for a, b in zip(current, value)]
+    else:
+        value += merged.get(key, 0)
+    merged[key] = value
+
+
+registry = Registry()
+current = threading.local()
+_last_flush = [0.0]
+_flush_lock = threading.Lock()
+
+
+def _dump(snapshot):
+    return [
+        [name, list(map(list, labels)), value]
+        for (name, labels), value in snapshot.items()
+    ]
+
+
+def flush(force=False):
+    """Сохранить снимок процесса в METRICS_DIR для сборки по процессам.
+
+    Проверка интервала и запись идут под блокировкой: потоки одного
+    процесса пишут в один файл. Без force поток, заставший чужую запись,
+    свою пропускает. Временный файл у каждой записи свой, поэтому файл
+    снимка всегда целый.
+    """
+    directory = settings.METRICS_DIR
+    if not directory or not _flush_lock.acquire(blocking=force):
+        return
+    try:
+        now = time.monotonic()
+        if (
+            not force
+            and now - _last_flush[0] < settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        _last_flush[0] = now
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(
+            prefix=f'metrics-{os.getpid()}.', suffix='.tmp', dir=directory
+        )
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(_dump(registry.snapshot()), file)
+            os.replace(
+                temporary,
+                os.path.join(directory, f'metrics-{os.getpid()}.json'),
+            )
+        except BaseException:
+            os.unlink(temporary)
+            raise
+    finally:
+        _flush_lock.release()
+
+
+def collect():
+    """Снимок всех процессов (из METRICS_DIR) или только текущего."""
+    if not settings.METRICS_DIR:
+        return registry.snapshot()
+    flush(force=True)
+    merged = {}
+    pattern = os.path.join(settings.METRICS_DIR, 'metrics-*.json')
+    for path in glob.glob(pattern):
+        try:
+            with open(path) as file:
+                rows = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in rows:
+            key = (name, tuple(tuple(label) for label in labels))
+            _merge(merged, key, value)
+    return merged
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in pairs
+    )
+    return '{' + body + '}'
+
+
+def render(snapshot, gauges=()):
+    """Текстовый формат Prometheus 0.0.4."""
+    lines = []
+    typed = set()
+    for (name, labels), value in sorted(snapshot.items()):
+        if name not in typed:
+            kind = 'histogram' if name in HISTOGRAMS else 'counter'
+            lines.append(f'# TYPE {name} {kind}')
+            typed.add(name)
+        if name not in HISTOGRAMS:
+            lines.append(f'{name}{_labels(labels)} {value}')
+            continue
+        count, total, buckets = value[0], value[1], value[2:]
+        cumulative = 0
+        for bound, bucket in zip(HISTOGRAMS[name], buckets):
+            cumulative += bucket
+            lines.append(
+                f'{name}_bucket{_labels(labels, [("le", bound)])} '
+                f'{cumulative}'
+            )
+        lines.append(f'{name}_bucket{_labels(labels, [("le", "+Inf")])} '
+                     f'{count}')
+        lines.append(f'{name}_sum{_labels(labels)} {total}')
+        lines.append(f'{name}_count{_labels(labels)} {count}')
+    for name, labels, value in gauges:
+        if name not in typed:
+            lines.append(f'# TYPE {name} gauge')
+            typed.add(name)
+        lines.append(f'{name}{_labels(sorted(labels.items()))} {value}')
+    return '\n'.join(lines) + '\n'
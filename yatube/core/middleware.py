@@ -0,0 +1,110 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+
+from . import metrics, slow_queries, template_profiler
+
+
+class RequestStats:
+    """Счётчики одного запроса, которые наполняют обёртки вокруг
+    базы данных и шаблонов."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Записывает метрики каждого запроса по имени представления."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.current.stats = RequestStats()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.current.stats = None
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        labels = {'view': match.view_name if match else 'unresolved'}
+        registry = metrics.registry
+        registry.observe('yatube_request_duration_seconds', labels, elapsed)
+        registry.inc(
+            'yatube_requests_total',
+            {**labels, 'status': response.status_code}
+        )
+        registry.observe('yatube_db_queries', labels, stats.queries)
+        registry.observe(
+            'yatube_db_query_duration_seconds', labels, stats.query_seconds
+        )
+        registry.observe(
+            'yatube_template_render_seconds', labels, stats.template_seconds
+        )
+        if not response.streaming:
+            registry.observe(
+                'yatube_response_bytes', labels, len(response.content)
+            )
+        metrics.flush()
+        return response
+
+
+class SlowQueryMiddleware:
+    """Ведёт журнал медленных и повторяющихся запросов к базе для доли
+    запросов SLOW_QUERY_SAMPLE_RATE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not slow_queries.should_sample():
+            return self.get_response(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    slow_queries.SlowQueryLog(connection, request)
+                ))
+            return self.get_response(request)
+
+
+class TemplateProfileMiddleware:
+    """При TEMPLATE_PROFILING меряет шаблоны, теги и фильтры запроса и
+    отдаёт сводку в заголовке X-Template-Profile."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.TEMPLATE_PROFILING:
+            return self.get_response(request)
+        template_profiler.install(engines['django'].engine)
+        profile = metrics.current.template_profile = (
+            template_profiler.Profile()
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.template_profile = None
+        if profile.entries:
+            response['X-Template-Profile'] = profile.header()
+            template_profiler.record(profile)
+        return response
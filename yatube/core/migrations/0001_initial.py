@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpooledEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('sent', models.DateTimeField(blank=True, null=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='emails', to='tasks.Task')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='spooledemail',
+            index=models.Index(fields=['sent'], name='core_spoole_sent_3d3fc3_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SpooledEmail(models.Model):
+    """Письмо, ожидающее отправки задачей из очереди tasks."""
+    message = models.TextField()
+    task = models.ForeignKey(
+        'tasks.Task', on_delete=models.CASCADE, related_name='emails'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('sent',)),
+        )
+
+    def __str__(self):
+        return f'Письмо #{self.pk}'
+
+    def mark_sent(self):
+        self.sent = timezone.now()
+        self.save(update_fields=('sent',))
@@ -0,0 +1,102 @@
+import base64
+import json
+
+from django.db.models import F, Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode(values):
+    # isoformat(), а не DjangoJSONEncoder: он отбрасывает микросекунды.
+    values = [
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ]
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode(cursor, model, keys):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('Неверная длина курсора')
+        return [
+            model._meta.get_field(key).to_python(value)
+            for key, value in zip(keys, values)
+        ]
+    except Exception as error:
+        raise InvalidCursor(str(error)) from error
+
+
+def _equal(key, value):
+    if value is None:
+        return Q(**{f'{key}__isnull': True})
+    return Q(**{key: value})
+
+
+def _after(model, ordering, values):
+    """Условие «строго после курсора» для лексикографического порядка.
+
+    NULL всегда идут последними, в том числе при убывании.
+    """
+    condition = Q()
+    for position, key in enumerate(ordering):
+        name = key.lstrip('-')
+        value = values[position]
+        if value is None:
+            # После NULL в этом поле идут только такие же NULL.
+            continue
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        later = Q(**{f'{name}__{lookup}': value})
+        if model._meta.get_field(name).null:
+            later |= Q(**{f'{name}__isnull': True})
+        for previous, previous_value in zip(ordering[:position], values):
+            later &= _equal(previous.lstrip('-'), previous_value)
+        condition |= later
+    return condition
+
+
+def _order_by(model, ordering):
+    """Порядок с NULL в конце только для полей, которые их допускают:
+    для остальных сортировка остаётся простой и идёт по индексу."""
+    expressions = []
+    for key in ordering:
+        name = key.lstrip('-')
+        if not model._meta.get_field(name).null:
+            expressions.append(key)
+        elif key.startswith('-'):
+            expressions.append(F(name).desc(nulls_last=True))
+        else:
+            expressions.append(F(name).asc(nulls_last=True))
+    return expressions
+
+
+def _value(row, key):
+    if isinstance(row, dict):
+        return row[key]
+    return getattr(row, key)
+
+
+def paginate_by_cursor(queryset, cursor, per_page, ordering):
+    """Вернуть строки после курсора и курсор следующей страницы.
+
+    В отличие от OFFSET, стоимость чтения не растёт с глубиной: база
+    сразу переходит к ключу курсора по индексу. Поля ordering должны
+    однозначно упорядочивать строки, поэтому последним идёт id.
+    Строки - объекты моделей или словари из values() с этими полями.
+    """
+    keys = [key.lstrip('-') for key in ordering]
+    queryset = queryset.order_by(*_order_by(queryset.model, ordering))
+    if cursor:
+        values = _decode(cursor, queryset.model, keys)
+        queryset = queryset.filter(
+            _after(queryset.model, ordering, values)
+        )
+    rows = list(queryset[:per_page + 1])
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, _encode([_value(rows[-1], key) for key in keys])
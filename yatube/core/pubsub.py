@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+
+class Broker:
+    """Внутрипроцессная шина событий для потоков и корутин asyncio.
+
+    Каждая публикация получает порядковый номер. Подписчик ждёт, пока
+    в одном из его каналов не появится событие новее известного ему
+    номера, поэтому события между ожиданиями не теряются.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._sequence = 0
+        self._latest = {}
+        self._async_waiters = set()
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def publish(self, *channels):
+        with self._condition:
+            self._sequence += 1
+            for channel in channels:
+                self._latest[channel] = self._sequence
+            self._condition.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def changed(self, channels, after):
+        """Было ли в каналах событие новее номера after."""
+        return any(self._latest.get(channel, 0) > after
+                   for channel in channels)
+
+    def wait(self, channels, after, timeout):
+        """Ждать события в потоке. Вернуть текущий номер."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.changed(channels, after), timeout
+            )
+            return self._sequence
+
+    async def wait_async(self, channels, after, timeout):
+        """Ждать события в цикле asyncio, не занимая поток."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiter = (loop, asyncio.Event())
+        with self._condition:
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                remaining = deadline - loop.time()
+                if self.changed(channels, after) or remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            with self._condition:
+                self._async_waiters.discard(waiter)
+        return self._sequence
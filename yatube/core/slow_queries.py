@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.template.base import Template
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_SPACES = re.compile(r'\s+')
+_SKIPPED_FILES = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in (
+        'slow_queries.py', 'middleware.py', 'template_backends.py'
+    )
+)
+
+shapes = {}
+_shapes_lock = threading.Lock()
+_explaining = threading.local()
+
+
+def normalize(sql):
+    """Форма запроса: литералы и списки IN заменены заглушками."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def shape_id(shape):
+    return hashlib.md5(shape.encode()).hexdigest()[:12]
+
+
+def call_site():
+    """Ближайшая строка кода проекта и шаблон, из которых пришёл запрос."""
+    frame = sys._getframe(1)
+    site = template = None
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.abspath(code.co_filename)
+        if (
+            site is None
+            and filename.startswith(settings.BASE_DIR)
+            and filename not in _SKIPPED_FILES
+        ):
+            site = '{}:{} in {}'.format(
+                os.path.relpath(filename, settings.BASE_DIR),
+                frame.f_lineno, code.co_name,
+            )
+        if template is None and 'render' in code.co_name:
+            owner = frame.f_locals.get('self')
+            if isinstance(owner, Template):
+                template = owner.name
+        if site is not None and template is not None:
+            break
+        frame = frame.f_back
+    return site, template
+
+
+def explain(connection, sql, params):
+    """План запроса для SELECT или None."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+        else 'EXPLAIN '
+    )
+    _explaining.active = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+    except Exception as error:
+        return f'EXPLAIN не удался: {error}'
+    finally:
+        _explaining.active = False
+
+
+class SlowQueryLog:
+    """Обёртка execute: медленные запросы и повторы форм за запрос."""
+
+    def __init__(self, connection, request):
+        self.connection = connection
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.repeats = {}
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else 'unresolved'
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_explaining, 'active', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            shape = normalize(sql)
+            repeats = self.repeats[shape] = self.repeats.get(shape, 0) + 1
+            if elapsed >= self.threshold:
+                self.record(shape, sql, params, elapsed, 'slow')
+            if repeats == settings.SLOW_QUERY_REPEAT_THRESHOLD:
+                self.record(shape, sql, params, elapsed, 'repeated')
+
+    def record(self, shape, sql, params, elapsed, kind):
+        key = shape_id(shape)
+        view = self.view_name()
+        site, template = call_site()
+        with _shapes_lock:
+            entry = shapes.get(key)
+            if entry is None:
+                entry = shapes[key] = {
+                    'shape': shape,
+                    'count': 0,
+                    'total_seconds': 0.0,
+                    'max_seconds': 0.0,
+                    'views': set(),
+                    'sites': set(),
+                    'plan': None,
+                }
+            entry['count'] += 1
+            entry['total_seconds'] += elapsed
+            entry['max_seconds'] = max(entry['max_seconds'], elapsed)
+            entry['views'].add(view)
+            entry['sites'].add((site, template))
+            need_plan = entry['plan'] is None
+        if need_plan:
+            entry['plan'] = explain(self.connection, sql, params) or ''
+        metrics.registry.inc(
+            'yatube_slow_queries_total',
+            {'kind': kind, 'shape': key, 'view': view},
+        )
+        logger.warning(
+            '%s query %s (%.1f ms, %s раз в запросе) view=%s at %s '
+            'template=%s\n%s\n%s',
+            kind, key, elapsed * 1000, self.repeats[shape], view, site,
+            template, shape, entry['plan'],
+        )
+
+
+def should_sample():
+    return random.random() < settings.SLOW_QUERY_SAMPLE_RATE
+
+
+def report(limit=20):
+    """Самые дорогие формы запросов процесса по суммарному времени."""
+    with _shapes_lock:
+        entries = [
+            {**entry, 'id': key, 'views': sorted(entry['views']),
+             'sites': sorted(entry['sites'], key=str)}
+            for key, entry in shapes.items()
+        ]
+    entries.sort(key=lambda entry: entry['total_seconds'], reverse=True)
+    return entries[:limit]
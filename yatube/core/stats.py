@@ -0,0 +1,4 @@
+def percentile(values, percent):
+    """Перцентиль отсортированного по возрастанию непустого списка."""
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
@@ -0,0 +1,2 @@
+# Регистрирует задачу отправки писем при автопоиске модулей tasks.
+from .mail import deliver_emails  # noqa: F401
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics, template_profiler
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats = getattr(metrics.current, 'stats', None)
+            if stats is not None:
+                stats.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django с учётом времени рендеринга в метриках запроса.
+
+    При TEMPLATE_PROFILING замеры по шаблонам, тегам и фильтрам
+    включаются сразу при создании движка.
+    """
+
+    def __init__(self, params):
+        super().__init__(params)
+        if settings.TEMPLATE_PROFILING:
+            template_profiler.install(self.engine)
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
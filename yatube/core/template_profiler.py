@@ -0,0 +1,155 @@
+import functools
+import threading
+import time
+
+from django.template.backends.django import get_installed_libraries
+from django.template.base import Node, Template
+
+from . import metrics
+
+_installed = []
+_install_lock = threading.Lock()
+totals = {}
+_totals_lock = threading.Lock()
+
+
+class Profile:
+    """Время и число вызовов шаблонов, тегов и фильтров одного запроса.
+
+    Для каждого имени хранится [вызовы, общее время, собственное время];
+    собственное время не включает вложенные шаблоны и теги.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self._children = []
+
+    def measure(self, name, func, *args, **kwargs):
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            entry = self.entries.get(name)
+            if entry is None:
+                entry = self.entries[name] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - children
+
+    def top(self, limit):
+        return sorted(
+            self.entries.items(), key=lambda item: item[1][2], reverse=True
+        )[:limit]
+
+    def header(self, limit=10):
+        """calls/total_ms/self_ms для самых дорогих по собственному
+        времени."""
+        return ', '.join(
+            f'{name}={calls}/{total * 1000:.1f}/{own * 1000:.1f}'
+            for name, (calls, total, own) in self.top(limit)
+        )
+
+
+def _active():
+    return getattr(metrics.current, 'template_profile', None)
+
+
+def _profiled_render(render):
+    @functools.wraps(render)
+    def wrapper(self, context):
+        profile = _active()
+        if profile is None:
+            return render(self, context)
+        return profile.measure(
+            self.name or '<string>', render, self, context
+        )
+    return wrapper
+
+
+def _profiled_render_annotated(render_annotated):
+    @functools.wraps(render_annotated)
+    def wrapper(self, context):
+        name = getattr(self, 'profile_name', None)
+        profile = _active() if name else None
+        if profile is None:
+            return render_annotated(self, context)
+        return profile.measure(name, render_annotated, self, context)
+    return wrapper
+
+
+def _named_tag(name, compile_function):
+    @functools.wraps(compile_function)
+    def wrapper(parser, token):
+        node = compile_function(parser, token)
+        node.profile_name = f'tag:{name}'
+        return node
+    return wrapper
+
+
+def _profiled_filter(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _active()
+        if profile is None:
+            return func(*args, **kwargs)
+        return profile.measure(f'filter:{name}', func, *args, **kwargs)
+    return wrapper
+
+
+def install(engine):
+    """Включить замеры: обернуть рендеринг шаблонов, теги и фильтры
+    библиотек проекта и сторонних пакетов. Выполняется один раз."""
+    with _install_lock:
+        if _installed:
+            return
+        Template.render = _profiled_render(Template.render)
+        Node.render_annotated = _profiled_render_annotated(
+            Node.render_annotated
+        )
+        for name, module in get_installed_libraries().items():
+            if module.startswith('django.'):
+                continue
+            library = engine.template_libraries.get(name)
+            if library is None or getattr(library, 'profiled', False):
+                continue
+            for tag, compile_function in library.tags.items():
+                library.tags[tag] = _named_tag(tag, compile_function)
+            for filter_name, func in library.filters.items():
+                library.filters[filter_name] = _profiled_filter(
+                    filter_name, func
+                )
+            library.profiled = True
+        # Уже скомпилированные шаблоны держат необёрнутые теги и фильтры.
+        for loader in engine.template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+        _installed.append(True)
+
+
+def record(profile):
+    """Добавить профиль запроса в сводку процесса и в /metrics."""
+    with _totals_lock:
+        for name, (calls, total, own) in profile.entries.items():
+            entry = totals.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += total
+            entry[2] += own
+    for name, (calls, _, own) in profile.entries.items():
+        labels = {'template': name}
+        metrics.registry.inc('yatube_template_calls_total', labels, calls)
+        metrics.registry.inc(
+            'yatube_template_self_seconds_total', labels, own
+        )
+
+
+def report(limit=20):
+    """Сводка процесса: (имя, вызовы, общее время, собственное время)."""
+    with _totals_lock:
+        rows = [(name, *entry) for name, entry in totals.items()]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows[:limit]
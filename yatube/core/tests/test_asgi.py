@@ -0,0 +1,67 @@
+import asyncio
+from http import HTTPStatus
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from ..asgi_adapter import WsgiToAsgi
+
+
+class WsgiToAsgiTests(SimpleTestCase):
+    def setUp(self):
+        self.application = WsgiToAsgi(get_wsgi_application(), 2)
+
+    def tearDown(self):
+        self.application.executor.shutdown()
+
+    def call(self, scope, incoming):
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.application(scope, receive, send))
+        return sent
+
+    def test_http_request_is_served(self):
+        """ASGI-запрос выполняется синхронным представлением Django."""
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/about/author/',
+            'query_string': b'',
+            'headers': [(b'host', b'localhost')],
+        }
+        sent = self.call(scope, [{'type': 'http.request', 'body': b''}])
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+
+        self.assertEqual(sent[0]['status'], HTTPStatus.OK)
+        self.assertIn('Об авторе'.encode(), body)
+
+    def test_lifespan_is_acknowledged(self):
+        """Сервер получает подтверждение запуска и остановки."""
+        sent = self.call({'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ])
+
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+    def test_startup_hooks_run_on_lifespan_startup(self):
+        """Функции запуска вызываются сервером, а не при импорте."""
+        started = []
+        self.application.on_startup.append(started.append)
+        self.assertEqual(started, [])
+
+        self.call({'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ])
+
+        self.assertEqual(started, [self.application.wsgi_application])
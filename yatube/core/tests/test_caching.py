@@ -0,0 +1,131 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.feed_cache import feed_cache_key
+from posts.models import Post
+from posts.scope_versions import INDEX_SCOPE, get_versions
+
+from ..caching import LOCK_SUFFIX, get_or_compute
+
+User = get_user_model()
+
+THREADS = 16
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def slow_compute(self):
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return 'page'
+
+    def run_concurrently(self):
+        barrier = threading.Barrier(THREADS)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(get_or_compute('feed', self.slow_compute, 20))
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_cold_cache_is_computed_once(self):
+        """При пустом кэше значение пересчитывает только один поток."""
+        results = self.run_concurrently()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['page'] * THREADS)
+
+    def test_expired_value_is_recomputed_once(self):
+        """После истечения срока пересчёт один, остальные ждать не должны."""
+        cache.set('feed', ('stale', 0.2, time.time() - 1), 60)
+        results = self.run_concurrently()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), THREADS)
+        self.assertIn('stale', results)
+
+    def test_fresh_value_is_not_recomputed(self):
+        """Свежее значение берётся из кэша без пересчёта."""
+        get_or_compute('feed', self.slow_compute, 20)
+        get_or_compute('feed', self.slow_compute, 20)
+
+        self.assertEqual(self.calls, 1)
+
+    def test_foreign_lock_is_not_released(self):
+        """Истёкшую и взятую другим процессом блокировку не снимаем."""
+        def compute():
+            # Пересчёт затянулся: блокировка истекла, её взял другой.
+            cache.set('feed' + LOCK_SUFFIX, 'other', 10)
+            return 'page'
+
+        get_or_compute('feed', compute, 20)
+
+        self.assertEqual(cache.get('feed' + LOCK_SUFFIX), 'other')
+
+
+class IndexFeedStampedeTests(TransactionTestCase):
+    """Одновременные запросы главной при истёкшем ключе ленты."""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        for number in range(15):
+            Post.objects.create(text=f'post {number}', author=author)
+
+    def feed_queries_per_request(self):
+        barrier = threading.Barrier(THREADS)
+        counts = []
+
+        def count_feed_queries(execute, sql, params, many, context):
+            if '"posts_post"' in sql:
+                context['connection'].feed_queries += 1
+            return execute(sql, params, many, context)
+
+        def worker():
+            connection.feed_queries = 0
+            barrier.wait()
+            with connection.execute_wrapper(count_feed_queries):
+                response = Client().get(reverse('posts:index'))
+            self.assertEqual(response.status_code, 200)
+            counts.append(connection.feed_queries)
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(counts), THREADS)
+        return counts
+
+    def test_expired_feed_is_rendered_by_one_request(self):
+        """Ленту из базы читает один запрос, остальные отдают старую."""
+        Client().get(reverse('posts:index'))
+        key = feed_cache_key('index_page', 1, get_versions(INDEX_SCOPE))
+        body, delta, _ = cache.get(key)
+        cache.set(key, (body, delta, time.time() - 1), 60)
+
+        counts = self.feed_queries_per_request()
+
+        self.assertEqual(len([count for count in counts if count]), 1)
+
+    def test_cold_feed_is_rendered_by_one_request(self):
+        counts = self.feed_queries_per_request()
+
+        self.assertEqual(len([count for count in counts if count]), 1)
@@ -0,0 +1,147 @@
+from django.core import mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+
+from tasks.models import Task
+from tasks.worker import run_next
+
+from ..mail import (SpoolEmailBackend, message_from_json, message_to_json,
+                    spool_stats)
+from ..models import SpooledEmail
+
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class CountingBackend(BaseEmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+
+    def send_messages(self, email_messages):
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class FlakyBackend(BaseEmailBackend):
+    """Первая попытка отправить «Тема 1» падает."""
+    failed = False
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if message.subject == 'Тема 1' and not FlakyBackend.failed:
+                FlakyBackend.failed = True
+                raise ConnectionError('SMTP недоступен')
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+@override_settings(EMAIL_SPOOL_BACKEND=LOCMEM_BACKEND)
+class SpoolEmailBackendTests(TestCase):
+    def spool(self, count):
+        messages = [
+            EmailMessage(f'Тема {num}', 'Текст', 'from@ya.tube', ['to@a.b'])
+            for num in range(count)
+        ]
+        SpoolEmailBackend().send_messages(messages)
+
+    def test_messages_are_spooled_not_sent(self):
+        """Бэкенд кладёт письма в очередь одной задачей, ничего не шлёт."""
+        self.spool(3)
+
+        self.assertEqual(SpooledEmail.objects.count(), 3)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(spool_stats()['queued'], 3)
+
+    @override_settings(EMAIL_SPOOL_BATCH=2)
+    def test_large_call_is_split_into_batches(self):
+        self.spool(5)
+
+        self.assertEqual(Task.objects.count(), 3)
+
+    @override_settings(
+        EMAIL_SPOOL_BACKEND='core.tests.test_mail.CountingBackend'
+    )
+    def test_batch_is_sent_over_one_connection(self):
+        """Пачка писем уходит через одно открытое соединение."""
+        self.spool(3)
+        CountingBackend.opened = 0
+
+        self.assertTrue(run_next())
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ['Тема 0', 'Тема 1', 'Тема 2']
+        )
+        stats = spool_stats()
+        self.assertEqual((stats['queued'], stats['sent']), (0, 3))
+        self.assertIn('latency_p95', stats)
+
+    @override_settings(
+        EMAIL_SPOOL_BACKEND='core.tests.test_mail.FailingBackend',
+        TASKS_MAX_ATTEMPTS=1
+    )
+    def test_failed_message_is_marked(self):
+        """Письмо, чья задача исчерпала попытки, считается ошибочным."""
+        self.spool(1)
+        run_next()
+
+        stats = spool_stats()
+        self.assertEqual((stats['queued'], stats['failed']), (0, 1))
+        self.assertIn('SMTP', Task.objects.get().last_error)
+
+    @override_settings(
+        EMAIL_SPOOL_BACKEND='core.tests.test_mail.FailingBackend'
+    )
+    def test_failed_message_is_postponed(self):
+        """Неотправленное письмо откладывается с задержкой очереди задач."""
+        self.spool(1)
+        run_next()
+
+        self.assertFalse(run_next())
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.PENDING, 1))
+
+    @override_settings(
+        EMAIL_SPOOL_BACKEND='core.tests.test_mail.FlakyBackend'
+    )
+    def test_retry_skips_sent_messages(self):
+        """Повтор задачи не отправляет письма пачки второй раз."""
+        FlakyBackend.failed = False
+        self.spool(3)
+        run_next()
+        Task.objects.update(available_at=Task.objects.get().created)
+        run_next()
+
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ['Тема 0', 'Тема 1', 'Тема 2']
+        )
+
+    def test_message_survives_json_round_trip(self):
+        message = EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@ya.tube', ['to@a.b'], bcc=['bcc@a.b'],
+            headers={'X-Tag': 'signup'}, reply_to=['reply@a.b'],
+        )
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.attach('data.bin', b'\x00\xff', 'application/octet-stream')
+
+        restored = message_from_json(message_to_json(message))
+
+        self.assertEqual(restored.bcc, ['bcc@a.b'])
+        self.assertEqual(restored.extra_headers, {'X-Tag': 'signup'})
+        self.assertEqual(
+            restored.alternatives, [('<p>Текст</p>', 'text/html')]
+        )
+        self.assertEqual(
+            restored.attachments,
+            [('data.bin', b'\x00\xff', 'application/octet-stream')]
+        )
+        self.assertEqual(restored.reply_to, ['reply@a.b'])
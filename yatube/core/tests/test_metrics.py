@@ -0,0 +1,163 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+
+User = get_user_model()
+
+
+class RegistryTests(TestCase):
+    def test_threads_are_merged(self):
+        """Шарды потоков складываются при чтении."""
+        registry = metrics.Registry()
+
+        def work():
+            for _ in range(100):
+                registry.inc('requests', {'view': 'index'})
+                registry.observe(
+                    'yatube_db_queries', {'view': 'index'}, 3
+                )
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = registry.snapshot()
+        labels = (('view', 'index'),)
+        self.assertEqual(snapshot[('requests', labels)], 400)
+        histogram = snapshot[('yatube_db_queries', labels)]
+        self.assertEqual(histogram[:2], [400, 1200])
+        self.assertEqual(sum(histogram[2:]), 400)
+
+    def test_render_histogram_is_cumulative(self):
+        registry = metrics.Registry()
+        for value in (0, 1, 7):
+            registry.observe('yatube_db_queries', {'view': 'a'}, value)
+        text = metrics.render(registry.snapshot())
+        self.assertIn('# TYPE yatube_db_queries histogram', text)
+        self.assertIn('yatube_db_queries_bucket{view="a",le="1"} 2', text)
+        self.assertIn('yatube_db_queries_bucket{view="a",le="+Inf"} 3', text)
+        self.assertIn('yatube_db_queries_sum{view="a"} 8', text)
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        metrics.registry.clear()
+        cache.clear()
+
+    def test_request_is_recorded_per_view(self):
+        """Запрос попадает в метрики под именем своего представления."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(
+            response['Content-Type'],
+            'text/plain; version=0.0.4; charset=utf-8'
+        )
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_requests_total{status="200",view="posts:index"} 1', text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            text
+        )
+        self.assertIn('yatube_db_queries_count{view="posts:index"}', text)
+        self.assertIn(
+            'yatube_template_render_seconds_count{view="posts:index"}', text
+        )
+        self.assertIn('yatube_tasks{status="pending"} 0', text)
+
+    def test_cache_hits_by_prefix(self):
+        cache.set('feed:1', 'страница')
+        cache.get('feed:1')
+        cache.get_many(['feed:1', 'feed:2'])
+        snapshot = metrics.registry.snapshot()
+        name = 'yatube_cache_requests_total'
+        self.assertEqual(
+            snapshot[(name, (('prefix', 'feed'), ('result', 'hit')))], 2
+        )
+        self.assertEqual(
+            snapshot[(name, (('prefix', 'feed'), ('result', 'miss')))], 1
+        )
+
+    def test_cache_prefixes_are_bounded(self):
+        """Ключи sorl-thumbnail и ключи без разделителя не плодят метки."""
+        cache.get('sorl-thumbnail||image||abc123')
+        cache.get('sorl-thumbnail||image||def456')
+        cache.get('a1b2c3')
+        prefixes = {
+            dict(labels)['prefix']
+            for name, labels in metrics.registry.snapshot()
+            if name == 'yatube_cache_requests_total'
+        }
+        self.assertEqual(prefixes, {'sorl-thumbnail', 'other'})
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_hidden_from_other_addresses(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='secret')
+    def test_token_opens_metrics_behind_proxy(self):
+        url = reverse('metrics')
+        wrong = self.client.get(url, HTTP_AUTHORIZATION='Bearer guess')
+        right = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(wrong.status_code, 404)
+        self.assertEqual(right.status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_staff_sees_metrics(self):
+        staff = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_processes_are_merged_from_directory(self):
+        """Снимки других процессов складываются с текущим."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'metrics-1.json'), 'w') as file:
+            json.dump([['requests', [['view', 'index']], 5]], file)
+        metrics.registry.inc('requests', {'view': 'index'}, 2)
+        with override_settings(METRICS_DIR=directory):
+            snapshot = metrics.collect()
+        self.assertEqual(snapshot[('requests', (('view', 'index'),))], 7)
+
+    def test_concurrent_flushes_leave_one_whole_file(self):
+        """Потоки одного процесса не портят и не теряют файл снимка."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        metrics.registry.inc('requests', {'view': 'index'})
+        errors = []
+
+        def work():
+            try:
+                for _ in range(20):
+                    metrics.flush(force=True)
+                    metrics.flush()
+            except Exception as error:
+                errors.append(error)
+
+        with override_settings(METRICS_DIR=directory):
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            os.listdir(directory), [f'metrics-{os.getpid()}.json']
+        )
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        with open(path) as file:
+            rows = json.load(file)
+        self.assertIn(['requests', [['view', 'index']], 1], rows)
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from ..pubsub import Broker
+
+
+class BrokerTests(SimpleTestCase):
+    def test_thread_waiter_wakes_on_publish(self):
+        """Поток просыпается при публикации в его канале."""
+        broker = Broker()
+        after = broker.sequence
+        timer = threading.Timer(0.05, broker.publish, ('index',))
+        timer.start()
+
+        self.assertGreater(broker.wait(['index'], after, 5), after)
+        timer.join()
+
+    def test_other_channels_do_not_wake(self):
+        """Публикация в чужом канале не будит подписчика."""
+        broker = Broker()
+        broker.publish('group:1')
+
+        self.assertFalse(broker.changed(['index'], 0))
+
+    def test_async_waiter_wakes_on_publish(self):
+        """Корутина просыпается при публикации из другого потока."""
+        broker = Broker()
+
+        async def wait():
+            threading.Timer(0.05, broker.publish, ('index',)).start()
+            return await broker.wait_async(['index'], 0, 5)
+
+        self.assertEqual(asyncio.run(wait()), 1)
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from .. import slow_queries
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_SAMPLE_RATE=1)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=author)
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post,
+                author=User.objects.create_user(username=f'reader{num}'),
+                text='Комментарий',
+            )
+            for num in range(3)
+        )
+
+    def setUp(self):
+        slow_queries.shapes.clear()
+
+    def test_normalize(self):
+        self.assertEqual(
+            slow_queries.normalize(
+                "SELECT a FROM t WHERE b = 'x''y' AND c IN (%s, %s)\n"
+                "LIMIT 21"
+            ),
+            'SELECT a FROM t WHERE b = ? AND c IN (...) LIMIT ?'
+        )
+
+    @override_settings(
+        SLOW_QUERY_THRESHOLD_MS=10000, SLOW_QUERY_REPEAT_THRESHOLD=3
+    )
+    def test_repeated_shape_is_attributed_to_template(self):
+        """N+1 в шаблоне комментариев виден с представлением и шаблоном."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get(url)
+        self.assertEqual(len(logs.output), 1)
+        message = logs.output[0]
+        self.assertIn('repeated', message)
+        self.assertIn('view=posts:post_detail', message)
+        self.assertIn('posts/views.py', message)
+        self.assertIn('template=includes/comments.html', message)
+        self.assertIn('"auth_user"', message)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_aggregated_with_plan(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        with self.assertLogs('core.slow_queries', 'WARNING'):
+            self.client.get(url)
+            self.client.get(url)
+        entry = next(
+            entry for entry in slow_queries.report(limit=100)
+            if 'FROM "posts_comment"' in entry['shape']
+        )
+        self.assertEqual(entry['count'], 2)
+        self.assertEqual(entry['views'], ['posts:post_detail'])
+        self.assertIn('posts_comment', entry['plan'])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_logged(self):
+        self.client.get(reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertEqual(slow_queries.report(), [])
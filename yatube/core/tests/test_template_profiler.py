@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from .. import template_profiler
+
+User = get_user_model()
+
+
+@override_settings(TEMPLATE_PROFILING=True)
+class TemplateProfilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {num}', author=cls.user) for num in range(3)
+        )
+
+    def setUp(self):
+        template_profiler.totals.clear()
+
+    def header(self, response):
+        return dict(
+            part.split('=', 1)
+            for part in response['X-Template-Profile'].split(', ')
+        )
+
+    def test_includes_are_timed_per_request(self):
+        """Каждый include посчитан с числом вызовов и временем."""
+        response = self.client.get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        header = self.header(response)
+        calls, total, own = header['includes/post_for_cycle.html'].split('/')
+        self.assertEqual(calls, '3')
+        self.assertGreaterEqual(float(total), float(own))
+        self.assertIn('posts/profile.html', header)
+        self.assertIn('includes/paginator.html', header)
+
+    def test_custom_filters_are_timed(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertIn('filter:addclass', response['X-Template-Profile'])
+
+    def test_report_aggregates_requests(self):
+        url = reverse('posts:profile', args=[self.user.username])
+        self.client.get(url)
+        self.client.get(url)
+        rows = {row[0]: row for row in template_profiler.report(limit=100)}
+        self.assertEqual(rows['posts/profile.html'][1], 2)
+        self.assertEqual(rows['includes/post_for_cycle.html'][1], 6)
+
+    @override_settings(TEMPLATE_PROFILING=False)
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('X-Template-Profile'))
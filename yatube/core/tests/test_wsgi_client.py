@@ -0,0 +1,26 @@
+from http import HTTPStatus
+
+from django.test import SimpleTestCase, override_settings
+
+from yatube.wsgi import application
+
+from ..wsgi_client import call_wsgi, make_environ
+
+
+class WsgiClientTests(SimpleTestCase):
+    @override_settings(ALLOWED_HOSTS=['.example.com'], DEBUG=False)
+    def test_host_is_taken_from_allowed_hosts(self):
+        """Запросы без заголовка Host проходят проверку ALLOWED_HOSTS."""
+        environ = make_environ('GET', '/about/author/')
+        self.assertEqual(environ['HTTP_HOST'], 'example.com')
+
+        status, _, _ = call_wsgi(application, '/about/author/')
+        self.assertEqual(status, HTTPStatus.OK)
+
+    def test_explicit_host_is_kept(self):
+        environ = make_environ(
+            'GET', '/', headers={'host': 'regularsite.pythonanywhere.com'}
+        )
+        self.assertEqual(
+            environ['HTTP_HOST'], 'regularsite.pythonanywhere.com'
+        )
@@ -1,6 +1,24 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics as metrics_registry
+from .mail import spool_stats
+
+
+def _queue_gauges():
+    from tasks.models import Task
+    from tasks.worker import queue_stats
+
+    tasks = queue_stats(window=0)
+    for status, _ in Task.STATUSES:
+        yield 'yatube_tasks', {'status': status}, tasks[status]
+    mail = spool_stats(window=0)
+    for state in ('queued', 'failed'):
+        yield 'yatube_spooled_emails', {'state': state}, mail[state]
 
 
 def page_not_found(request, exception):
@@ -23,3 +41,31 @@ def internal_server_error(request):
         {'path': request.path},
         HTTPStatus.INTERNAL_SERVER_ERROR
     )
+
+
+def _metrics_allowed(request):
+    """Персонал, Bearer-токен METRICS_TOKEN или адрес из списка.
+
+    Адрес проверяется по REMOTE_ADDR и подтверждает что-то только при
+    прямом подключении: за прокси это адрес самого прокси.
+    """
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    if token and constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    if not _metrics_allowed(request):
+        raise Http404
+    body = metrics_registry.render(
+        metrics_registry.collect(), _queue_gauges()
+    )
+    return HttpResponse(
+        body, content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
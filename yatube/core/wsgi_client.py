@@ -0,0 +1,74 @@
+import io
+import sys
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+DEFAULT_HOST = 'localhost'
+
+
+def default_host():
+    """Хост для запросов без заголовка Host: первый из ALLOWED_HOSTS."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return DEFAULT_HOST
+
+
+def make_environ(method, path, query='', body=b'', headers=None,
+                 server=(DEFAULT_HOST, 80), client=('127.0.0.1', 0),
+                 scheme='http'):
+    """Собрать WSGI environ запроса."""
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path or '/',
+        'QUERY_STRING': query,
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in (headers or {}).items():
+        name = name.upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        environ[name] = value
+    environ.setdefault('HTTP_HOST', default_host())
+    return environ
+
+
+def start_wsgi(application, environ):
+    """Вызвать WSGI-приложение и вернуть код, заголовки и итератор тела."""
+    response = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = response_headers
+
+    result = application(environ, start_response)
+    return response['status'], response['headers'], result
+
+
+def call_wsgi(application, url, method='GET', body=b'', headers=None):
+    """Выполнить запрос к WSGI-приложению в текущем процессе без сети.
+
+    Возвращает код ответа, заголовки и тело ответа.
+    """
+    parts = urlsplit(url)
+    environ = make_environ(method, parts.path, parts.query, body, headers)
+    status, response_headers, result = start_wsgi(application, environ)
+    try:
+        content = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return status, response_headers, content
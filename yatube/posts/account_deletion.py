@@ -0,0 +1,177 @@
+"""Удаление аккаунта с контентом пачками в фоновой очереди.
+
+Каскад user.delete() собирает в Python все связанные строки и шлёт
+сигнал на каждую, а транзакция держит блокировки до конца. Здесь каждая
+задача удаляет не больше ACCOUNT_DELETION_BATCH_SIZE строк одним DELETE
+по списку id, сама сбрасывает версии затронутых областей и ставит
+в очередь следующую пачку. Между пачками выполняются другие задачи
+и запросы сайта.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from tasks.registry import task
+
+from . import group_stats
+from .models import (AccountDeletion, Comment, Follow, Mention, Post,
+                     PostScore, PostTag)
+from .scope_versions import (INDEX_SCOPE, author_scope, bump_versions,
+                             group_scope, post_scope, sitemap_scope)
+from .sitemaps import shard_of
+
+User = get_user_model()
+
+
+def _raw_delete(queryset):
+    """Один DELETE без сборщика каскадов и сигналов; число строк."""
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def _delete_comments(queryset, limit):
+    rows = list(queryset.order_by('pk').values_list('pk', 'post_id')[:limit])
+    if not rows:
+        return 0
+    _raw_delete(Comment.objects.filter(pk__in=[pk for pk, _ in rows]))
+    bump_versions(*(post_scope(post_id) for _, post_id in rows))
+    return len(rows)
+
+
+def delete_own_comments(user_id, limit):
+    return _delete_comments(Comment.objects.filter(author_id=user_id), limit)
+
+
+def delete_comments_on_posts(user_id, limit):
+    return _delete_comments(
+        Comment.objects.filter(post__author_id=user_id), limit
+    )
+
+
+def delete_follows(user_id, limit):
+    rows = list(
+        Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+        .order_by('pk')
+        .values_list('pk', 'user_id', 'author_id')[:limit]
+    )
+    if not rows:
+        return 0
+    _raw_delete(Follow.objects.filter(pk__in=[row[0] for row in rows]))
+    bump_versions(*(
+        author_scope(other)
+        for _, follower, author in rows
+        for other in (follower, author)
+    ))
+    return len(rows)
+
+
+def delete_posts(user_id, limit):
+    """Удалить пачку постов, комментарии к которым уже удалены."""
+    rows = list(
+        Post.objects.filter(author_id=user_id)
+        .order_by('pk')
+        .values_list('pk', 'group_id')[:limit]
+    )
+    if not rows:
+        return 0
+    post_ids = [pk for pk, _ in rows]
+    group_ids = {group_id for _, group_id in rows if group_id}
+    for model in (PostScore, PostTag, Mention):
+        _raw_delete(model.objects.filter(post_id__in=post_ids))
+    _raw_delete(Post.objects.filter(pk__in=post_ids))
+    # Ссылки last_post на удалённые посты исправляет пересчёт сводки
+    # в той же транзакции: внешние ключи проверяются при коммите.
+    for group_id in group_ids:
+        group_stats.refresh(group_id)
+    bump_versions(
+        INDEX_SCOPE,
+        author_scope(user_id),
+        *(post_scope(pk) for pk in post_ids),
+        *(group_scope(group_id) for group_id in group_ids),
+        *(sitemap_scope('groups', shard_of(pk)) for pk in group_ids),
+        *{sitemap_scope('posts', shard_of(pk)) for pk in post_ids},
+    )
+    return len(rows)
+
+
+# Порядок важен: сначала строки, ссылающиеся на посты автора.
+STEPS = (
+    delete_own_comments,
+    delete_comments_on_posts,
+    delete_follows,
+    delete_posts,
+)
+
+
+def count_rows(user_id):
+    return (
+        Comment.objects.filter(
+            Q(author_id=user_id) | Q(post__author_id=user_id)
+        ).count()
+        + Follow.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        ).count()
+        + Post.objects.filter(author_id=user_id).count()
+    )
+
+
+def start_account_deletion(user):
+    """Отключить вход и поставить удаление аккаунта в очередь.
+
+    Повторный вызов для того же пользователя возвращает уже
+    существующую запись о ходе удаления.
+    """
+    deletion, created = AccountDeletion.objects.get_or_create(
+        user_id=user.pk,
+        defaults={
+            'username': user.username,
+            'rows_total': count_rows(user.pk),
+        },
+    )
+    if created:
+        # update() вместо save(): без сигналов и сброса версий sitemap.
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        _enqueue_next(deletion)
+    return deletion
+
+
+def _enqueue_next(deletion):
+    delete_account_batch.enqueue(
+        deletion.pk,
+        idempotency_key=f'account_deletion:{deletion.pk}:{deletion.batches}',
+    )
+
+
+@task
+def delete_account_batch(deletion_id):
+    """Удалить одну пачку строк и поставить в очередь следующую.
+
+    Пачка, следующая задача и счётчики пишутся в одной транзакции:
+    при падении обработчика очередь повторит ровно эту пачку.
+    """
+    limit = settings.ACCOUNT_DELETION_BATCH_SIZE
+    with transaction.atomic():
+        deletion = (
+            AccountDeletion.objects.select_for_update()
+            .filter(pk=deletion_id)
+            .first()
+        )
+        if deletion is None or deletion.status == AccountDeletion.DONE:
+            return
+        for step in STEPS:
+            deleted = step(deletion.user_id, limit)
+            if deleted:
+                break
+        else:
+            # Контента не осталось, каскаду пользователя почти нечего
+            # собирать: права, группы и записи журнала админки.
+            User.objects.filter(pk=deletion.user_id).delete()
+            deletion.status = AccountDeletion.DONE
+            deletion.finished = timezone.now()
+        deletion.batches += 1
+        if deletion.status != AccountDeletion.DONE:
+            deletion.status = AccountDeletion.RUNNING
+            deletion.rows_deleted += deleted
+            _enqueue_next(deletion)
+        deletion.save()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import AccountDeletion, Comment, Follow, Group, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -23,7 +23,19 @@ class FollowAdmin(admin.ModelAdmin):
     list_display = ('user', 'author')
 
 
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'username', 'status', 'progress', 'batches', 'created', 'finished'
+    )
+    list_filter = ('status',)
+    readonly_fields = (
+        'user_id', 'username', 'status', 'batches',
+        'rows_total', 'rows_deleted', 'created', 'finished',
+    )
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.urls import reverse
+
+from core.wsgi_client import call_wsgi
+
+from .models import GroupStats
+
+User = get_user_model()
+
+
+def get_hot_urls(index_pages, groups, profiles):
+    """Собрать адреса самых посещаемых страниц: ленты, групп, профилей."""
+    index_url = reverse('posts:index')
+    urls = [index_url] + [
+        f'{index_url}?page={page}' for page in range(2, index_pages + 1)
+    ]
+    top_groups = (
+        GroupStats.objects.order_by('-posts_count', '-group')
+        .values_list('group__slug', flat=True)[:groups]
+    )
+    urls += [
+        reverse('posts:group_list', kwargs={'slug': slug})
+        for slug in top_groups
+    ]
+    top_authors = (
+        User.objects.annotate(posts_count=Count('posts'))
+        .order_by('-posts_count')
+        .values_list('username', flat=True)[:profiles]
+    )
+    urls += [
+        reverse('posts:profile', kwargs={'username': username})
+        for username in top_authors
+    ]
+    return urls + list(settings.CACHE_WARM_URLS)
+
+
+def warm_cache(application, urls, workers):
+    """Отрендерить страницы через WSGI-приложение в пуле потоков.
+
+    Рендеринг заполняет кэш ленты и миниатюры картинок. Возвращает
+    список (адрес, код ответа, секунды) и общее время прогрева.
+    """
+    def fetch(url):
+        started = time.monotonic()
+        status, _, _ = call_wsgi(application, url)
+        return url, status, time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch, urls))
+    return results, time.monotonic() - started
+
+
+def warm_cache_in_background(application):
+    """Прогреть кэш процесса после старта, не задерживая его запуск.
+
+    Вызывается ASGI-сервером при lifespan.startup, а не при импорте
+    приложения, поэтому команды manage.py и тесты кэш не прогревают.
+    """
+    def run():
+        urls = get_hot_urls(
+            settings.CACHE_WARM_INDEX_PAGES,
+            settings.CACHE_WARM_GROUPS,
+            settings.CACHE_WARM_PROFILES,
+        )
+        warm_cache(application, urls, settings.CACHE_WARM_WORKERS)
+
+    threading.Thread(target=run, name='cache-warming', daemon=True).start()
@@ -0,0 +1,95 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.views.decorators.http import condition
+
+from .models import Group, Post
+from .profile_header import get_profile_author
+from .scope_versions import (INDEX_SCOPE, SUGGESTIONS_SCOPE, author_scope,
+                             get_versions, group_scope, post_scope)
+
+User = get_user_model()
+
+
+def index_scopes(request):
+    return [INDEX_SCOPE]
+
+
+def group_scopes(request, slug):
+    group_id = (
+        Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    )
+    return group_id and [group_scope(group_id)]
+
+
+def profile_scopes(request, username):
+    """Версии профиля, прочитанные вместе с автором для представления."""
+    author = get_profile_author(request, username)
+    versions = {
+        author_scope(author.pk): (
+            author.author_version, author.author_changed
+        ),
+    }
+    if request.user.pk == author.pk:
+        # На своей странице пользователь видит рекомендации.
+        versions[SUGGESTIONS_SCOPE] = (
+            author.suggestions_version, author.suggestions_changed
+        )
+    return versions
+
+
+def post_scopes(request, post_id):
+    author_id = (
+        Post.objects.filter(pk=post_id)
+        .values_list('author_id', flat=True)
+        .first()
+    )
+    return author_id and [post_scope(post_id), author_scope(author_id)]
+
+
+def get_request_versions(request, scopes_func, kwargs):
+    """Прочитать версии областей страницы один раз на запрос.
+
+    Возвращает {область: (версия, время изменения)} или пустое значение,
+    если объекта страницы нет. Повторные вызовы в том же запросе, из ETag
+    и из самого представления, берут уже прочитанные версии. scopes_func
+    может сразу вернуть такой словарь, если прочитал версии сам.
+    """
+    if not hasattr(request, '_scope_versions'):
+        scopes = scopes_func(request, **kwargs)
+        if scopes and not isinstance(scopes, dict):
+            scopes = get_versions(*scopes)
+        request._scope_versions = scopes
+    return request._scope_versions
+
+
+def conditional_on(scopes_func):
+    """Отвечать 304 Not Modified, пока версии областей не изменились.
+
+    ETag учитывает пользователя и адрес с номером страницы, поэтому
+    шапка одного пользователя не достанется другому. Last-Modified
+    отдаётся только анонимам: для них страница зависит лишь от контента.
+    """
+    def etag(request, *args, **kwargs):
+        versions = get_request_versions(request, scopes_func, kwargs)
+        if not versions:
+            return None
+        parts = [
+            f'{scope}={version}'
+            for scope, (version, _) in sorted(versions.items())
+        ]
+        parts += [str(request.user.pk), request.get_full_path()]
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        versions = get_request_versions(request, scopes_func, kwargs)
+        if not versions:
+            return None
+        changed = [changed for _, changed in versions.values()]
+        if None in changed:
+            return None
+        return max(changed)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
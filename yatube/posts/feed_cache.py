@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.caching import get_or_compute
+
+FEED_TEMPLATE = 'includes/feed.html'
+
+
+def cached_page_number(request):
+    """Номер страницы для ключа кэша или None, если её не кэшируем.
+
+    Нечисловой ?page= Paginator.get_page превращает в первую страницу,
+    поэтому он делит её запись. Номера вне 1..FEED_CACHE_PAGES рендерятся
+    без кэша: иначе любое значение параметра заводило бы новую запись.
+    """
+    page = request.GET.get('page')
+    if page is None:
+        return 1
+    try:
+        number = int(page)
+    except ValueError:
+        return 1
+    if 1 <= number <= settings.FEED_CACHE_PAGES:
+        return number
+    return None
+
+
+def feed_cache_key(key_prefix, page, versions):
+    parts = [f'{scope}={version}' for scope, (version, _) in sorted(
+        versions.items()
+    )]
+    return ':'.join([key_prefix, str(page)] + parts)
+
+
+def get_cached_feed(request, key_prefix, timeout, get_context, versions):
+    """Вернуть HTML ленты, общий для всех пользователей.
+
+    В кэш попадает только тело ленты без шапки и переключателя подписок,
+    поэтому его можно отдавать и анонимам, и авторизованным юзерам.
+    В ключ входят версии областей ленты, те же, что и в ETag: новый пост
+    сразу даёт новый ключ, и под свежим ETag не отдаётся старое тело.
+    """
+    def render_feed():
+        return render_to_string(FEED_TEMPLATE, get_context(), request)
+
+    page = cached_page_number(request)
+    if page is None:
+        return mark_safe(render_feed())
+    body = get_or_compute(
+        feed_cache_key(key_prefix, page, versions), render_feed, timeout
+    )
+    return mark_safe(body)
@@ -0,0 +1,150 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatechars
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from core.caching import get_or_compute
+
+from .conditional import (conditional_on, get_request_versions,
+                          group_scopes, index_scopes, profile_scopes)
+from .models import Group, Post
+from .profile_header import get_profile_author
+
+User = get_user_model()
+
+
+class LatestPostsFeed(Feed):
+    """Последние посты сайта; наследники сужают выборку."""
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return (
+            self.posts(obj)
+            .select_related('author', 'group')
+            [:settings.FEED_ITEMS]
+        )
+
+    def item_title(self, post):
+        return truncatechars(post.text, 60)
+
+    def item_description(self, post):
+        return post.get_text_html()
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=[post.pk])
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse('posts:profile', args=[post.author.username])
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def posts(self, group):
+        return Post.objects.filter(group=group)
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        # Автор уже прочитан для ETag в profile_scopes.
+        return get_profile_author(request, username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def posts(self, author):
+        return Post.objects.filter(author=author)
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class LatestPostsAtomFeed(AtomMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomMixin, AuthorPostsFeed):
+    pass
+
+
+def cached_feed(feed, scopes_func):
+    """Представление ленты с кэшем по версиям областей и ответом 304.
+
+    В ключ кэша входят версии областей, поэтому изменение поста
+    или группы сразу даёт новый ключ, а старый просто истекает. Схема
+    и хост тоже в ключе: ссылки в XML абсолютные.
+    """
+    @conditional_on(scopes_func)
+    def view(request, **kwargs):
+        versions = get_request_versions(request, scopes_func, kwargs)
+        if not versions:
+            return feed(request, **kwargs)
+        parts = [request.scheme, request.get_host(), request.path] + [
+            f'{scope}={version}'
+            for scope, (version, _) in sorted(versions.items())
+        ]
+        key = 'feed:' + hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+        def render_feed():
+            response = feed(request, **kwargs)
+            return response.content, response['Content-Type']
+
+        content, content_type = get_or_compute(
+            key, render_feed, settings.FEED_CACHE_TIMEOUT
+        )
+        return HttpResponse(content, content_type=content_type)
+    return view
+
+
+index_rss = cached_feed(LatestPostsFeed(), index_scopes)
+index_atom = cached_feed(LatestPostsAtomFeed(), index_scopes)
+group_rss = cached_feed(GroupPostsFeed(), group_scopes)
+group_atom = cached_feed(GroupPostsAtomFeed(), group_scopes)
+profile_rss = cached_feed(AuthorPostsFeed(), profile_scopes)
+profile_atom = cached_feed(AuthorPostsAtomFeed(), profile_scopes)
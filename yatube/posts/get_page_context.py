@@ -2,8 +2,11 @@ from django.conf import settings
 from django.core.paginator import Paginator
 
 
-def get_page_context(request, posts):
+def get_page_context(request, posts, count=None):
     paginator = Paginator(posts, settings.POST_PER_PAGE)
+    if count is not None:
+        # Число объектов уже известно, COUNT(*) повторно не выполняем.
+        paginator.count = count
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
@@ -0,0 +1,93 @@
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+
+from .models import Group, GroupStats, Post
+
+
+def refresh(group_id):
+    """Пересчитать сводку группы целиком по её постам."""
+    latest = (
+        Post.objects.filter(group_id=group_id)
+        .order_by('-pub_date', '-pk')
+        .values('pk', 'pub_date')
+        .first()
+    )
+    GroupStats.objects.update_or_create(
+        group_id=group_id,
+        defaults={
+            'posts_count': Post.objects.filter(group_id=group_id).count(),
+            'last_post_id': latest and latest['pk'],
+            'last_post_at': latest and latest['pub_date'],
+        },
+    )
+
+
+def post_added(group_id, post):
+    updated = GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') + 1
+    )
+    if not updated:
+        refresh(group_id)
+        return
+    GroupStats.objects.filter(
+        Q(last_post_at__isnull=True) | Q(last_post_at__lte=post.pub_date),
+        group_id=group_id,
+    ).update(last_post_at=post.pub_date, last_post_id=post.pk)
+
+
+def post_removed(group_id, post_id):
+    """Уменьшить счётчик; последний пост ищется заново, только если
+    ушёл именно он (при удалении его ссылка уже обнулена SET_NULL)."""
+    GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=Greatest(F('posts_count') - 1, 0)
+    )
+    was_latest = GroupStats.objects.filter(
+        Q(last_post_id=post_id) | Q(last_post__isnull=True),
+        group_id=group_id,
+    ).exists()
+    if not was_latest:
+        return
+    latest = (
+        Post.objects.filter(group_id=group_id)
+        .exclude(pk=post_id)
+        .order_by('-pub_date', '-pk')
+        .values('pk', 'pub_date')
+        .first()
+    )
+    GroupStats.objects.filter(group_id=group_id).update(
+        last_post_id=latest and latest['pk'],
+        last_post_at=latest and latest['pub_date'],
+    )
+
+
+def rebuild_all():
+    """Пересчитать сводки всех групп: после bulk_create и миграций."""
+    stats = {
+        row['group']: row
+        for row in Post.objects.filter(group__isnull=False)
+        .values('group')
+        .annotate(posts_count=Count('pk'), last_post_at=Max('pub_date'))
+        .order_by()
+    }
+    GroupStats.objects.all().delete()
+    rows = []
+    for group_id in Group.objects.values_list('pk', flat=True).iterator():
+        row = stats.get(group_id, {})
+        latest = None
+        if row:
+            latest = (
+                Post.objects.filter(
+                    group_id=group_id, pub_date=row['last_post_at']
+                )
+                .order_by('-pk')
+                .values_list('pk', flat=True)
+                .first()
+            )
+        rows.append(GroupStats(
+            group_id=group_id,
+            posts_count=row.get('posts_count', 0),
+            last_post_at=row.get('last_post_at'),
+            last_post_id=latest,
+        ))
+    GroupStats.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
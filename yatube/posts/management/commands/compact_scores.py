@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.popularity import compact, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из популярной ленты посты с затухшей вовлечённостью. '
+        'С --rebuild пересчитывает score по постам и комментариям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true')
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help='За сколько дней учитывать события при пересчёте.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = rebuild(options['days'])
+            self.stdout.write(f'Пересчитано постов: {count}')
+        deleted = compact()
+        self.stdout.write(f'Удалено затухших постов: {deleted}')
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого читать» по графу подписок. '
+        'Запускается по расписанию, а не на запрос.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int)
+        parser.add_argument('--block-size', type=int, default=2000)
+        parser.add_argument(
+            '--fanout', type=int,
+            help='Сколько подписчиков популярного автора брать в выборку.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        users, edges = suggestions.rebuild(
+            top_k=options['top_k'],
+            block_size=options['block_size'],
+            fanout=options['fanout'],
+            seed=options['seed'],
+        )
+        self.stdout.write(
+            f'Пользователей: {users}, подписок: {edges}, '
+            f'за {time.monotonic() - started:.1f} с'
+        )
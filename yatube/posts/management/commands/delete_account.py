@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.account_deletion import start_account_deletion
+from posts.models import AccountDeletion
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Ставит в очередь удаление аккаунтов с их контентом пачками; '
+        'без аргументов показывает ход начатых удалений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+
+    def handle(self, *args, **options):
+        for username in options['usernames']:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Пользователь {username} не найден')
+            start_account_deletion(user)
+        for deletion in AccountDeletion.objects.order_by('created'):
+            self.stdout.write(
+                f'{deletion.username}: {deletion.get_status_display()}, '
+                f'{deletion.progress():.0%} '
+                f'({deletion.rows_deleted} из {deletion.rows_total} строк, '
+                f'пачек: {deletion.batches})'
+            )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import rebuild_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сводки каталога групп по постам: нужна после '
+        'bulk_create, который не шлёт сигналов.'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_all()
+        self.stdout.write(f'Пересчитано групп: {count}')
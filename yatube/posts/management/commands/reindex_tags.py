@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.tagging import reindex
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает индекс хэштегов и упоминаний по всем постам: '
+        'нужен после bulk_create, который не шлёт сигналов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = reindex(options['batch_size'])
+        self.stdout.write(f'Проиндексировано постов: {count}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.rendering import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет готовый HTML постов и комментариев, созданных '
+        'bulk_create или до появления этих полей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true', dest='everything',
+            help='Перерисовать и строки с уже заполненным HTML.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            count = backfill(
+                model, options['everything'], options['batch_size']
+            )
+            self.stdout.write(f'{model.__name__}: обновлено {count}')
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.cache_warming import get_hot_urls, warm_cache
+from yatube.wsgi import application
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэш страниц и миниатюр, рендеря популярные адреса '
+        'через WSGI-приложение. LocMemCache живёт в памяти процесса, '
+        'поэтому для него используйте CACHE_WARM_ON_START: прогрев '
+        'запустится при старте ASGI-сервера (yatube.asgi).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--index-pages', type=int,
+            default=settings.CACHE_WARM_INDEX_PAGES
+        )
+        parser.add_argument(
+            '--groups', type=int, default=settings.CACHE_WARM_GROUPS
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=settings.CACHE_WARM_PROFILES
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.CACHE_WARM_WORKERS
+        )
+
+    def handle(self, *args, **options):
+        urls = get_hot_urls(
+            options['index_pages'], options['groups'], options['profiles']
+        )
+        results, elapsed = warm_cache(application, urls, options['workers'])
+        for url, status, seconds in results:
+            self.stdout.write(f'{status} {seconds * 1000:8.1f} ms  {url}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето адресов: {len(results)} за {elapsed:.2f} с'
+        ))
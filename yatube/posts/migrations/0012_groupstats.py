@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    for group in Group.objects.all():
+        posts = Post.objects.filter(group=group)
+        latest = posts.order_by('-pub_date', '-pk').first()
+        GroupStats.objects.create(
+            group=group,
+            posts_count=posts.count(),
+            last_post=latest,
+            last_post_at=latest.pub_date if latest else None,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_postscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('last_post_at', models.DateTimeField(blank=True, null=True)),
+                ('last_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['last_post_at', 'group'], name='groupstats_activity'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['posts_count', 'group'], name='groupstats_posts'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_post_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100)),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='posts.Post')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', 'pub_date', 'post'], name='posttag_feed'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='posttag',
+            unique_together={('tag', 'post')},
+        ),
+        migrations.AddIndex(
+            model_name='mention',
+            index=models.Index(fields=['user', 'pub_date', 'post'], name='mention_feed'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='mention',
+            unique_together={('user', 'post')},
+        ),
+    ]
@@ -1,15 +1,55 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.safestring import mark_safe
+
+from .rendering import (comment_text_html, post_preview_html,
+                        post_text_html)
 
 User = get_user_model()
 
 
 class PostBase(models.Model):
     pub_date = models.DateTimeField("дата публикации", auto_now_add=True)
+    text_html = models.TextField(editable=False, blank=True)
+
+    # Поля с HTML, которые render_html() выводит из text.
+    html_fields = ('text_html',)
 
     class Meta:
         abstract = True
 
+    def render_html(self):
+        """Заполнить поля html_fields по тексту.
+
+        Хук для наследников: save() и backfill() зовут его перед записью.
+        Базовая версия ничего не делает.
+        """
+
+    def _rendered(self, field):
+        """Готовый HTML поля; у строк из bulk_create — рендер на лету.
+
+        Из базы HTML приходит обычной строкой, поэтому помечается
+        безопасным здесь, а шаблоны выводят его без |safe.
+        """
+        if not getattr(self, field):
+            self.render_html()
+        return mark_safe(getattr(self, field))
+
+    def get_text_html(self):
+        return self._rendered('text_html')
+
+    def save(self, *args, **kwargs):
+        """Сохранить вместе с текстом его готовый HTML.
+
+        Пустой HTML у строк из bulk_create шаблоны заменяют рендером
+        текста на лету, а команда render_html заполняет его заранее.
+        """
+        self.render_html()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *self.html_fields}
+        super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -40,6 +80,9 @@ class Post(PostBase):
         blank=True,
         null=True,
     )
+    preview_html = models.TextField(editable=False, blank=True)
+
+    html_fields = ('text_html', 'preview_html')
 
     class Meta:
         ordering = ('-pub_date',)
@@ -47,6 +90,13 @@ class Post(PostBase):
     def __str__(self):
         return self.text[:15]
 
+    def render_html(self):
+        self.text_html = post_text_html(self.text)
+        self.preview_html = post_preview_html(self.text)
+
+    def get_preview_html(self):
+        return self._rendered('preview_html')
+
 
 class Comment(PostBase):
     post = models.ForeignKey(
@@ -67,6 +117,9 @@ class Comment(PostBase):
     def __str__(self):
         return self.text
 
+    def render_html(self):
+        self.text_html = comment_text_html(self.text)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -82,3 +135,186 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ['user', 'author']
+
+
+class ScopeVersion(models.Model):
+    """Версия области контента (лента, группа, автор, пост)."""
+    scope = models.CharField(max_length=64, unique=True)
+    version = models.PositiveIntegerField(default=0)
+    changed = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.scope}@{self.version}'
+
+
+class PostScore(models.Model):
+    """Затухающая во времени вовлечённость поста для популярной ленты.
+
+    score хранится в логарифмической шкале относительно общей эпохи:
+    ln(сумма весов событий * e^((время события - эпоха) / tau)). Общий
+    множитель затухания у всех постов одинаков, поэтому порядок по
+    score совпадает с порядком по текущей вовлечённости.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity',
+    )
+    score = models.FloatField(db_index=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.3f}'
+
+
+class GroupStats(models.Model):
+    """Число постов и последняя активность группы для каталога групп.
+
+    Обновляется сигналами при записи постов, чтобы каталог не считал
+    COUNT и MAX(pub_date) по каждой группе.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(null=True, blank=True)
+    last_post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['last_post_at', 'group'], name='groupstats_activity'
+            ),
+            models.Index(
+                fields=['posts_count', 'group'], name='groupstats_posts'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.group_id}: {self.posts_count}'
+
+
+class AccountDeletion(models.Model):
+    """Фоновое удаление аккаунта и его контента пачками.
+
+    Пользователь не связан внешним ключом: запись переживает удаление
+    аккаунта и остаётся отчётом о выполненной работе.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+    )
+
+    user_id = models.PositiveIntegerField(unique=True)
+    username = models.CharField(max_length=150)
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING
+    )
+    batches = models.PositiveIntegerField(default=0)
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_deleted = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def progress(self):
+        """Доля удалённых строк от оценки на старте, от 0 до 1."""
+        if self.status == self.DONE:
+            return 1.0
+        if not self.rows_total:
+            return 0.0
+        return min(self.rows_deleted / self.rows_total, 1.0)
+
+    def __str__(self):
+        return f'{self.username} [{self.status}, {self.progress():.0%}]'
+
+
+class PostTag(models.Model):
+    """Хэштег поста: инвертированный индекс тег → посты.
+
+    pub_date копирует дату поста, чтобы лента тега читалась одним
+    диапазоном индекса (tag, pub_date, post) без соединения с постами.
+    """
+    tag = models.CharField(max_length=100)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tags',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('tag', 'post')
+        indexes = [
+            models.Index(
+                fields=['tag', 'pub_date', 'post'], name='posttag_feed'
+            ),
+        ]
+
+    def __str__(self):
+        return f'#{self.tag} → {self.post_id}'
+
+
+class Mention(models.Model):
+    """Упоминание пользователя в посте: индекс пользователь → посты."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'], name='mention_feed'
+            ),
+        ]
+
+    def __str__(self):
+        return f'@{self.user_id} → {self.post_id}'
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендованный автор, посчитанный офлайн по графу подписок."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    updated = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'author')
+        indexes = [
+            models.Index(fields=['user', 'rank'], name='suggestion_lookup'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} → {self.author_id} ({self.score:.1f})'
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+from django.template.loader import render_to_string
+
+from core.pubsub import Broker
+
+from .models import Post
+from .scope_versions import INDEX_SCOPE, author_scope, group_scope
+
+broker = Broker()
+
+
+def publish_new_post(post):
+    """Разбудить клиентов, ждущих новых постов в лентах этого поста."""
+    channels = [INDEX_SCOPE, author_scope(post.author_id)]
+    if post.group_id:
+        channels.append(group_scope(post.group_id))
+    broker.publish(*channels)
+
+
+class ChannelPoller:
+    """Проверка базы на новые посты: раз в интервал на канал и процесс.
+
+    Посты из других процессов не проходят через шину этого процесса.
+    Вместо того чтобы каждое соединение считало свои посты по таймеру,
+    первый ждущий канала раз в SSE_POLL_INTERVAL читает id последнего
+    поста канала. Если он вырос, событие публикуется в шину, и ждущие
+    потоки считают свои новые посты уже по делу. Каналы одного вида
+    проверяются одним запросом.
+    """
+
+    # Вид канала: поле поста, по которому канал выбирает посты.
+    FIELDS = {'group': 'group_id', 'author': 'author_id'}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+        self._latest = {}
+
+    def _due(self, channels, now):
+        with self._lock:
+            due = [
+                channel for channel in channels
+                if now - self._checked.get(channel, -float('inf'))
+                >= settings.SSE_POLL_INTERVAL
+            ]
+            for channel in due:
+                self._checked[channel] = now
+        return due
+
+    def _fetch(self, channels):
+        latest = {}
+        by_kind = {}
+        for channel in channels:
+            if channel == INDEX_SCOPE:
+                latest[channel] = (
+                    Post.objects.aggregate(latest=Max('pk'))['latest']
+                )
+                continue
+            kind, pk = channel.split(':', 1)
+            by_kind.setdefault(kind, []).append(int(pk))
+        for kind, ids in by_kind.items():
+            field = self.FIELDS[kind]
+            rows = dict(
+                Post.objects.filter(**{f'{field}__in': ids})
+                .order_by()
+                .values_list(field)
+                .annotate(latest=Max('pk'))
+            )
+            for pk in ids:
+                latest[f'{kind}:{pk}'] = rows.get(pk)
+        return latest
+
+    def check(self, channels):
+        """Проверить каналы, чья очередь подошла; опубликовать новые."""
+        due = self._due(channels, time.monotonic())
+        if not due:
+            return
+        latest = self._fetch(due)
+        with self._lock:
+            changed = [
+                channel for channel, pk in latest.items()
+                if channel in self._latest and self._latest[channel] != pk
+            ]
+            self._latest.update(latest)
+        if changed:
+            broker.publish(*changed)
+
+
+poller = ChannelPoller()
+
+
+def _event(name, event_id, data):
+    return (
+        f'id: {event_id}\nevent: {name}\ndata: {json.dumps(data)}\n\n'
+    ).encode()
+
+
+def _in_thread(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+class NewPostsStream:
+    """Поток server-sent events о новых постах ленты.
+
+    Поток отдаёт одно событие и закрывается, а браузер переподключается
+    с Last-Event-ID. Свои посты поток считает при подключении и когда
+    шина сообщает о событии в его каналах; посты других процессов
+    находит общий для процесса ChannelPoller.
+    """
+
+    def __init__(self, posts, channels, last_id, with_cards=False):
+        self.posts = posts
+        self.channels = channels
+        self.last_id = last_id
+        self.with_cards = with_cards
+
+    def poll(self):
+        """Вернуть событие о новых постах или None, если их нет."""
+        if self.last_id is None:
+            latest = (
+                Post.objects.order_by('-pk')
+                .values_list('pk', flat=True)
+                .first()
+            )
+            return _event('sync', latest or 0, {})
+        new_posts = self.posts.filter(pk__gt=self.last_id).order_by('-pk')
+        count = new_posts.count()
+        if not count:
+            return None
+        data = {'count': count}
+        latest = new_posts.values_list('pk', flat=True).first()
+        if self.with_cards:
+            data['cards'] = render_to_string(
+                'includes/new_post_cards.html',
+                {'posts': new_posts.select_related('author', 'group')[
+                    :settings.POST_PER_PAGE
+                ]}
+            )
+        return _event('new-posts', latest, data)
+
+    def __iter__(self):
+        yield f'retry: {settings.SSE_RETRY}\n\n'.encode()
+        deadline = time.monotonic() + settings.SSE_WAIT_TIMEOUT
+        after = broker.sequence
+        event = self.poll()
+        while event is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield b': timeout\n\n'
+                return
+            poller.check(self.channels)
+            seen, after = after, broker.wait(
+                self.channels, after,
+                min(remaining, settings.SSE_POLL_INTERVAL)
+            )
+            if broker.changed(self.channels, seen):
+                event = self.poll()
+        yield event
+
+    async def astream(self):
+        """Тот же поток для ASGI: ожидание не занимает поток."""
+        loop = asyncio.get_running_loop()
+        yield f'retry: {settings.SSE_RETRY}\n\n'.encode()
+        deadline = loop.time() + settings.SSE_WAIT_TIMEOUT
+        after = broker.sequence
+        event = await loop.run_in_executor(None, _in_thread, self.poll)
+        while event is None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                yield b': timeout\n\n'
+                return
+            await loop.run_in_executor(
+                None, _in_thread, poller.check, self.channels
+            )
+            seen, after = after, await broker.wait_async(
+                self.channels, after,
+                min(remaining, settings.SSE_POLL_INTERVAL)
+            )
+            if broker.changed(self.channels, seen):
+                event = await loop.run_in_executor(
+                    None, _in_thread, self.poll
+                )
+        yield event
@@ -0,0 +1,115 @@
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from .models import Comment, Post, PostScore
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+BATCH_SIZE = 500
+
+
+def _tau():
+    return settings.POPULAR_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+
+def log_weight(weight, when=None):
+    """Вес события в логарифмической шкале score."""
+    when = when or timezone.now()
+    return math.log(weight) + (when - EPOCH).total_seconds() / _tau()
+
+
+def _log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def add_engagement(post_id, kind, when=None):
+    """Прибавить к score поста событие kind одним UPDATE.
+
+    ln(e^score + e^value) = max + ln(1 + e^-|score - value|) считается в
+    базе, поэтому одновременные события не теряются.
+    """
+    value = log_weight(settings.POPULAR_WEIGHTS[kind], when)
+    new = Value(value, output_field=FloatField())
+    score = (
+        Greatest(F('score'), new)
+        + Ln(Value(1.0) + Exp(-Abs(F('score') - new)))
+    )
+    if PostScore.objects.filter(post_id=post_id).update(score=score):
+        return
+    try:
+        with transaction.atomic():
+            PostScore.objects.create(post_id=post_id, score=value)
+    except IntegrityError:
+        PostScore.objects.filter(post_id=post_id).update(score=score)
+
+
+def add_follow_engagement(author_id, when=None):
+    """Новый подписчик поднимает последний пост автора."""
+    latest = (
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date')
+        .values_list('pk', flat=True)
+        .first()
+    )
+    if latest is not None:
+        add_engagement(latest, 'follow', when)
+
+
+def popular_posts():
+    """Посты по убыванию score: чтение по индексу без агрегатов.
+
+    При равном score новее тот, что выше: без этого порядок страниц
+    пагинации не определён.
+    """
+    return (
+        Post.objects.filter(popularity__isnull=False)
+        .select_related('author', 'group')
+        .order_by('-popularity__score', '-pub_date', '-pk')
+    )
+
+
+def compact(now=None):
+    """Удалить посты, чья вовлечённость затухла ниже
+    POPULAR_MIN_WEIGHT, чтобы таблица оставалась маленькой."""
+    threshold = log_weight(settings.POPULAR_MIN_WEIGHT, now)
+    deleted, _ = PostScore.objects.filter(score__lt=threshold).delete()
+    return deleted
+
+
+def rebuild(days, now=None):
+    """Пересчитать score постов за days дней по постам и комментариям.
+
+    Нужен после bulk_create, который не шлёт сигналов. У подписок нет
+    даты, поэтому их вклад при пересчёте не восстанавливается.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=days)
+    scores = {}
+    events = [
+        (Post.objects.filter(pub_date__gte=since)
+         .values_list('pk', 'pub_date'), 'post'),
+        (Comment.objects.filter(post__pub_date__gte=since)
+         .values_list('post_id', 'pub_date'), 'comment'),
+    ]
+    for rows, kind in events:
+        weight = settings.POPULAR_WEIGHTS[kind]
+        for post_id, when in rows.iterator():
+            value = log_weight(weight, when)
+            current = scores.get(post_id)
+            scores[post_id] = (
+                value if current is None else _log_add(current, value)
+            )
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        PostScore.objects.bulk_create(
+            (PostScore(post_id=post_id, score=score)
+             for post_id, score in scores.items()),
+            batch_size=BATCH_SIZE,
+        )
+    return len(scores)
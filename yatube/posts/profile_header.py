@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.db.models import (BooleanField, CharField, Count, Exists,
+                              IntegerField, OuterRef, Subquery, Value)
+from django.db.models.functions import Cast, Coalesce, Concat
+from django.shortcuts import get_object_or_404
+
+from .models import Follow, Post, ScopeVersion
+from .scope_versions import SUGGESTIONS_SCOPE, author_scope
+
+User = get_user_model()
+
+
+def _count_by(queryset, field):
+    """Подзапрос, считающий строки queryset для текущего пользователя."""
+    counted = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(
+        Subquery(counted, output_field=IntegerField()), Value(0)
+    )
+
+
+def with_profile_stats(authors, user):
+    """Добавить к авторам счётчики постов, подписок и признак подписки."""
+    if user.is_authenticated:
+        is_following = Exists(
+            Follow.objects.filter(user=user, author=OuterRef('pk'))
+        )
+    else:
+        is_following = Value(False, output_field=BooleanField())
+    return authors.annotate(
+        posts_count=_count_by(Post.objects.all(), 'author'),
+        followers_count=_count_by(Follow.objects.all(), 'author'),
+        following_count=_count_by(Follow.objects.all(), 'user'),
+        is_following=is_following,
+    )
+
+
+def _version(scope, field):
+    return Subquery(
+        ScopeVersion.objects.filter(scope=scope).values(field)[:1]
+    )
+
+
+def with_scope_versions(authors):
+    """Добавить версии области автора и рекомендаций для ETag профиля."""
+    authors = authors.annotate(
+        author_scope_name=Concat(
+            Value(author_scope('')), Cast('pk', CharField()),
+            output_field=CharField(),
+        )
+    )
+    own = OuterRef('author_scope_name')
+    return authors.annotate(
+        author_version=Coalesce(_version(own, 'version'), Value(0)),
+        author_changed=_version(own, 'changed'),
+        suggestions_version=Coalesce(
+            _version(SUGGESTIONS_SCOPE, 'version'), Value(0)
+        ),
+        suggestions_changed=_version(SUGGESTIONS_SCOPE, 'changed'),
+    )
+
+
+def get_profile_author(request, username):
+    """Автор профиля со счётчиками, подпиской и версиями.
+
+    Читается одним запросом и запоминается на запросе: его берут
+    и ETag, и само представление.
+    """
+    author = getattr(request, '_profile_author', None)
+    if author is None or author.username != username:
+        authors = with_scope_versions(
+            with_profile_stats(User.objects.all(), request.user)
+        )
+        author = request._profile_author = get_object_or_404(
+            authors, username=username
+        )
+    return author
@@ -0,0 +1,60 @@
+import re
+
+from django.conf import settings
+from django.template.defaultfilters import (linebreaks_filter, linebreaksbr,
+                                            truncatechars)
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+# Решётка внутри слова или HTML-сущности (&#39;) тегом не считается.
+TAG_RE = re.compile(r'(?<![\w&])#(\w{1,100})')
+
+
+def link_tags(html):
+    """Превратить хэштеги уже экранированного HTML в ссылки на ленты."""
+    return mark_safe(TAG_RE.sub(
+        lambda match: '<a href="{}">{}</a>'.format(
+            reverse('posts:tag_feed', args=[match.group(1).lower()]),
+            match.group(0),
+        ),
+        html,
+    ))
+
+
+def post_text_html(text):
+    """HTML полного текста поста, как его рисовал фильтр linebreaks."""
+    return link_tags(linebreaks_filter(text, autoescape=True))
+
+
+def post_preview_html(text):
+    """HTML начала поста для карточек в лентах."""
+    return link_tags(linebreaksbr(
+        truncatechars(text, settings.POST_PREVIEW_CHARS), autoescape=True
+    ))
+
+
+def comment_text_html(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def backfill(model, everything=False, batch_size=1000):
+    """Заполнить готовый HTML строк, созданных без save().
+
+    Идёт по диапазонам первичного ключа и читает только id и текст;
+    с everything=True перерисовывает все строки, например после
+    изменения POST_PREVIEW_CHARS. Возвращает число обновлённых строк.
+    """
+    queryset = model.objects.order_by('pk').only('pk', 'text')
+    if not everything:
+        queryset = queryset.filter(text_html='')
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return updated
+        for obj in batch:
+            obj.render_html()
+        model.objects.bulk_update(batch, model.html_fields)
+        updated += len(batch)
+        last_pk = batch[-1].pk
@@ -0,0 +1,54 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ScopeVersion
+
+INDEX_SCOPE = 'index'
+# Общая версия рекомендаций: меняется после каждого пересчёта.
+SUGGESTIONS_SCOPE = 'suggestions'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def sitemap_scope(section, shard):
+    return f'sitemap:{section}:{shard}'
+
+
+def bump_versions(*scopes):
+    """Увеличить версии областей, затронутых изменением."""
+    for scope in set(scopes):
+        updated = ScopeVersion.objects.filter(scope=scope).update(
+            version=F('version') + 1, changed=timezone.now()
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                ScopeVersion.objects.create(scope=scope, version=1)
+        except IntegrityError:
+            ScopeVersion.objects.filter(scope=scope).update(
+                version=F('version') + 1, changed=timezone.now()
+            )
+
+
+def get_versions(*scopes):
+    """Вернуть {область: (версия, время изменения)} одним запросом."""
+    rows = ScopeVersion.objects.filter(scope__in=scopes).values_list(
+        'scope', 'version', 'changed'
+    )
+    versions = {scope: (0, None) for scope in scopes}
+    versions.update(
+        (scope, (version, changed)) for scope, version, changed in rows
+    )
+    return versions
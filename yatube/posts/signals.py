@@ -0,0 +1,123 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import group_stats
+from .models import Comment, Follow, Group, GroupStats, Post
+from .new_posts import publish_new_post
+from .popularity import add_engagement, add_follow_engagement
+from .scope_versions import (INDEX_SCOPE, author_scope, bump_versions,
+                             group_scope, post_scope, sitemap_scope)
+from .sitemaps import shard_of
+from .tagging import index_post
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    """Запомнить прежнюю группу поста, чтобы сбросить и её версию."""
+    instance._old_group_id = None
+    if instance.pk:
+        instance._old_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    scopes = [
+        INDEX_SCOPE,
+        author_scope(instance.author_id),
+        post_scope(instance.pk),
+    ]
+    if kwargs.get('created', True):
+        # Адрес поста появился или исчез: меняется только его шард.
+        scopes.append(sitemap_scope('posts', shard_of(instance.pk)))
+    for group_id in (instance.group_id,
+                     getattr(instance, '_old_group_id', None)):
+        if group_id:
+            # lastmod группы в sitemap — время её последнего поста.
+            scopes += [
+                group_scope(group_id),
+                sitemap_scope('groups', shard_of(group_id)),
+            ]
+    bump_versions(*scopes)
+    update_group_stats(instance, kwargs)
+    update_fields = kwargs.get('update_fields')
+    if 'created' in kwargs and (not update_fields or 'text' in update_fields):
+        index_post(instance)
+    if kwargs.get('created'):
+        add_engagement(instance.pk, 'post', instance.pub_date)
+        transaction.on_commit(lambda: publish_new_post(instance))
+
+
+def update_group_stats(instance, kwargs):
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if 'created' not in kwargs:
+        if instance.group_id:
+            group_stats.post_removed(instance.group_id, instance.pk)
+        return
+    if not kwargs['created'] and old_group_id == instance.group_id:
+        return
+    if old_group_id:
+        group_stats.post_removed(old_group_id, instance.pk)
+    if instance.group_id:
+        group_stats.post_added(instance.group_id, instance)
+
+
+@receiver(post_save, sender=Group)
+def group_created(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Group)
+def group_edited(sender, instance, created, **kwargs):
+    """Название и описание группы есть на её странице и в её фидах."""
+    if not created:
+        bump_versions(group_scope(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def author_edited(sender, instance, created, update_fields=None, **kwargs):
+    """Имя автора есть в шапке профиля, его фидах и карточках постов."""
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    bump_versions(author_scope(instance.pk), INDEX_SCOPE)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def sitemap_entry_changed(sender, instance, **kwargs):
+    section, field = (
+        ('groups', 'slug') if sender is Group else ('profiles', 'username')
+    )
+    update_fields = kwargs.get('update_fields')
+    if update_fields and field not in update_fields:
+        # Например, вход пользователя обновляет только last_login.
+        return
+    bump_versions(sitemap_scope(section, shard_of(instance.pk)))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_versions(post_scope(instance.post_id))
+    if kwargs.get('created'):
+        add_engagement(instance.post_id, 'comment', instance.pub_date)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    bump_versions(author_scope(instance.author_id),
+                  author_scope(instance.user_id))
+    if kwargs.get('created'):
+        add_follow_engagement(instance.author_id)
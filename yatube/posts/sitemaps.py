@@ -0,0 +1,161 @@
+import hashlib
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+
+from core.caching import get_or_compute
+
+from .conditional import conditional_on, get_request_versions
+from .models import Group, Post
+from .scope_versions import bump_versions, get_versions, sitemap_scope
+
+User = get_user_model()
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+# fields: pk и поля для адреса и lastmod в порядке аргументов entry.
+Section = namedtuple('Section', 'model fields entry')
+
+SECTIONS = {
+    'posts': Section(
+        Post,
+        ('pk', 'pub_date'),
+        lambda pk, pub_date: (
+            reverse('posts:post_detail', args=[pk]), pub_date
+        ),
+    ),
+    'groups': Section(
+        Group,
+        ('slug', 'stats__last_post_at'),
+        lambda slug, last_post_at: (
+            reverse('posts:group_list', args=[slug]), last_post_at
+        ),
+    ),
+    'profiles': Section(
+        User,
+        ('username',),
+        lambda username: (reverse('posts:profile', args=[username]), None),
+    ),
+}
+
+
+def shard_of(pk):
+    """Номер шарда: подряд идущие диапазоны id по SITEMAP_SHARD_SIZE."""
+    return (pk - 1) // settings.SITEMAP_SHARD_SIZE
+
+
+def shard_count(section):
+    max_pk = SECTIONS[section].model.objects.aggregate(Max('pk'))['pk__max']
+    return shard_of(max_pk) + 1 if max_pk else 0
+
+
+def bump_all_shards():
+    """Сбросить кэш всех шардов после массовых вставок без сигналов."""
+    bump_versions(*(
+        sitemap_scope(section, shard)
+        for section in SECTIONS
+        for shard in range(shard_count(section))
+    ))
+
+
+def shard_entries(section, shard):
+    """Пары (адрес, lastmod) шарда потоком, без загрузки всех моделей.
+
+    Выборка идёт по диапазону первичного ключа, поэтому стоимость шарда
+    не зависит от его номера, в отличие от OFFSET в пагинации.
+    """
+    model, fields, entry = SECTIONS[section]
+    size = settings.SITEMAP_SHARD_SIZE
+    rows = (
+        model.objects
+        .filter(pk__gt=shard * size, pk__lte=(shard + 1) * size)
+        .order_by('pk')
+        .values_list(*fields)
+        .iterator(chunk_size=2000)
+    )
+    for row in rows:
+        yield entry(*row)
+
+
+def _render(root, tag, base_url, entries):
+    yield XML_HEADER
+    yield f'<{root} xmlns="{XMLNS}">\n'
+    for loc, lastmod in entries:
+        yield f'<{tag}><loc>{escape(base_url + loc)}</loc>'
+        if lastmod is not None:
+            yield f'<lastmod>{lastmod.isoformat()}</lastmod>'
+        yield f'</{tag}>\n'
+    yield f'</{root}>\n'
+
+
+def _base_url(request):
+    return f'{request.scheme}://{request.get_host()}'
+
+
+def sitemap_index(request):
+    """Индекс sitemap: по одной ссылке на каждый шард каждого раздела.
+
+    lastmod шарда берётся из времени изменения его версии, поэтому
+    поисковик перечитывает только изменившиеся шарды, обычно последний.
+    """
+    shards = [
+        (section, shard)
+        for section in SECTIONS
+        for shard in range(shard_count(section))
+    ]
+    versions = get_versions(*(sitemap_scope(*key) for key in shards))
+    entries = (
+        (
+            reverse('posts:sitemap', args=[section, shard]),
+            versions[sitemap_scope(section, shard)][1],
+        )
+        for section, shard in shards
+    )
+    content = ''.join(_render(
+        'sitemapindex', 'sitemap', _base_url(request), entries
+    ))
+    return HttpResponse(content, content_type=CONTENT_TYPE)
+
+
+def sitemap_scopes(request, section, shard):
+    if section not in SECTIONS:
+        return None
+    return [sitemap_scope(section, shard)]
+
+
+@conditional_on(sitemap_scopes)
+def sitemap(request, section, shard):
+    """Один шард sitemap из кэша; ключ меняется вместе с версией шарда.
+
+    Шард за последним 404: в кэш попадает None, и Max(pk) считается
+    только при промахе. Первый пост нового шарда сбрасывает его версию.
+    """
+    versions = get_request_versions(request, sitemap_scopes, {
+        'section': section, 'shard': shard,
+    })
+    if not versions:
+        raise Http404('Раздел sitemap не найден')
+    version, _ = versions[sitemap_scope(section, shard)]
+    base_url = _base_url(request)
+    key = 'sitemap:' + hashlib.md5(
+        f'{base_url}|{section}|{shard}|{version}'.encode()
+    ).hexdigest()
+
+    def render_shard():
+        if shard >= shard_count(section):
+            return None
+        return ''.join(
+            _render('urlset', 'url', base_url, shard_entries(section, shard))
+        )
+
+    content = get_or_compute(key, render_shard, settings.SITEMAP_CACHE_TIMEOUT)
+    if content is None:
+        raise Http404('Шард sitemap не найден')
+    return HttpResponse(content, content_type=CONTENT_TYPE)
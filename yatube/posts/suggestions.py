@@ -0,0 +1,230 @@
+"""Рекомендации «кого читать» по графу подписок.
+
+Офлайн-задача выгружает Follow в массивы CSR (смежность по строкам)
+и для пачек пользователей векторными операциями NumPy считает два
+сигнала:
+
+- авторы, на которых подписаны мои авторы (друзья друзей, A·A);
+- авторы, которых читают вместе с моими: подписки подписчиков моих
+  авторов (A·Aᵀ·A). У популярного автора берётся случайная выборка
+  не больше fanout подписчиков, иначе пачка разрастается.
+
+Top-K сохраняется в FollowSuggestion, страницы читают готовые строки
+по индексу (user, rank).
+"""
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Follow, FollowSuggestion
+from .scope_versions import SUGGESTIONS_SCOPE, bump_versions
+
+
+def _csr(rows, columns, size, rng=None):
+    """Указатели строк и индексы столбцов; rng перемешивает строки."""
+    if rng is not None:
+        shuffle = rng.permutation(len(rows))
+        rows, columns = rows[shuffle], columns[shuffle]
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, columns[order]
+
+
+@dataclass
+class FollowGraph:
+    """Граф подписок в плотной нумерации 0..n-1.
+
+    ids[i] — id пользователя с номером i; follows — CSR «кто на кого
+    подписан», followers — обратный CSR со случайным порядком в строках.
+    """
+    ids: 'np.ndarray'
+    follows: tuple
+    followers: tuple
+
+    @classmethod
+    def from_edges(cls, users, authors, seed=0):
+        ids = np.unique(np.concatenate([users, authors]))
+        src = np.searchsorted(ids, users)
+        dst = np.searchsorted(ids, authors)
+        rng = np.random.default_rng(seed)
+        return cls(
+            ids=ids,
+            follows=_csr(src, dst, len(ids)),
+            followers=_csr(dst, src, len(ids), rng),
+        )
+
+    @property
+    def size(self):
+        return len(self.ids)
+
+    @property
+    def edges(self):
+        return len(self.follows[1])
+
+
+def _expand(paths, csr, fanout=None):
+    """Один шаг по графу для всех путей пачки сразу.
+
+    Путь — (номер пользователя в пачке, узел, вес). Каждый путь
+    заменяется путями во всех соседей узла, не больше fanout на узел,
+    с тем же весом.
+    """
+    segments, nodes, weights = paths
+    indptr, indices = csr
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    if fanout is not None:
+        lengths = np.minimum(lengths, fanout)
+    total = int(lengths.sum())
+    # Смещение внутри строки для каждого нового пути.
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths,
+                                           lengths)
+    return (
+        np.repeat(segments, lengths),
+        indices[np.repeat(starts, lengths) + offsets],
+        np.repeat(weights, lengths),
+    )
+
+
+def _merge(paths, size):
+    """Склеить пути с общими концами, сложив веса.
+
+    Возвращает пути, упорядоченные по (пользователь, узел).
+    """
+    segments, nodes, weights = paths
+    keys, inverse = np.unique(segments * size + nodes, return_inverse=True)
+    weights = np.bincount(inverse.ravel(), weights=weights)
+    return keys // size, keys % size, weights
+
+
+def suggest_block(graph, rows, top_k, weights, fanout):
+    """Top-K кандидатов для пачки пользователей (номера строк графа).
+
+    Возвращает массивы (пользователь, кандидат, вес, ранг) в плотной
+    нумерации. Вес кандидата — сумма весов всех путей до него;
+    похожие пользователи склеиваются до последнего шага, поэтому
+    число путей растёт не так быстро.
+    """
+    size = graph.size
+    segments = np.arange(len(rows))
+    first = _expand(
+        (segments, rows, np.ones(len(rows))), graph.follows
+    )
+    fof = _expand(
+        (first[0], first[1], first[2] * weights['fof']), graph.follows
+    )
+    similar = _merge(_expand(first, graph.followers, fanout), size)
+    cofollowed = _expand(
+        (similar[0], similar[1], similar[2] * weights['cofollowed']),
+        graph.follows,
+    )
+    owners, candidates, scores = _merge(
+        [np.concatenate(column) for column in zip(fof, cofollowed)], size
+    )
+    # Себя и тех, на кого уже подписан, не предлагаем.
+    known = np.concatenate([
+        first[0] * size + first[1], segments * size + rows,
+    ])
+    fresh = ~np.isin(owners * size + candidates, known)
+    owners, candidates, scores = (
+        owners[fresh], candidates[fresh], scores[fresh]
+    )
+    # Строки уже упорядочены по (пользователь, кандидат): устойчивая
+    # сортировка по убыванию веса внутри пользователя сохраняет этот
+    # порядок при равных весах.
+    order = np.argsort(
+        owners * (scores.max(initial=0) + 1) - scores, kind='stable'
+    )
+    owners, candidates, scores = (
+        owners[order], candidates[order], scores[order]
+    )
+    starts = np.searchsorted(owners, segments)
+    ranks = np.arange(len(owners)) - starts[owners]
+    keep = ranks < top_k
+    return (
+        rows[owners[keep]], candidates[keep], scores[keep], ranks[keep]
+    )
+
+
+def iter_suggestions(graph, top_k, block_size, weights, fanout):
+    """Рекомендации пачками по block_size строк графа.
+
+    Для пачки отдаются границы её диапазона id и массивы (пользователь,
+    автор, вес, ранг) уже в id пользователей.
+    """
+    for start in range(0, graph.size, block_size):
+        rows = np.arange(start, min(start + block_size, graph.size))
+        bounds = int(graph.ids[rows[0]]), int(graph.ids[rows[-1]])
+        indptr = graph.follows[0]
+        rows = rows[indptr[rows + 1] > indptr[rows]]
+        users, authors, scores, ranks = suggest_block(
+            graph, rows, top_k, weights, fanout
+        )
+        yield bounds, (graph.ids[users], graph.ids[authors], scores, ranks)
+
+
+def load_graph(seed=0, chunk_size=100000):
+    """Выгрузить Follow в FollowGraph, читая пары id потоком."""
+    pairs = (
+        Follow.objects.order_by()
+        .values_list('user_id', 'author_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    flat = np.fromiter(
+        itertools.chain.from_iterable(pairs), dtype=np.int64
+    ).reshape(-1, 2)
+    return FollowGraph.from_edges(flat[:, 0], flat[:, 1], seed)
+
+
+def rebuild(top_k=None, block_size=2000, fanout=None, seed=0):
+    """Пересчитать и сохранить рекомендации всех пользователей.
+
+    Каждая пачка заменяется в своей транзакции; строки, не обновлённые
+    в этом прогоне (пользователь от всех отписался), удаляются в конце.
+    Возвращает число пользователей и рёбер графа.
+    """
+    top_k = top_k or settings.SUGGESTIONS_TOP_K
+    fanout = fanout or settings.SUGGESTIONS_FANOUT
+    started = timezone.now()
+    graph = load_graph(seed)
+    blocks = iter_suggestions(
+        graph, top_k, block_size, settings.SUGGESTIONS_WEIGHTS, fanout
+    )
+    for (first_id, last_id), columns in blocks:
+        with transaction.atomic():
+            # Диапазоном, а не списком id: один DELETE по индексу.
+            FollowSuggestion.objects.filter(
+                user_id__gte=first_id, user_id__lte=last_id
+            ).delete()
+            FollowSuggestion.objects.bulk_create(
+                FollowSuggestion(
+                    user_id=user, author_id=author, score=score,
+                    rank=rank, updated=started,
+                )
+                for user, author, score, rank in zip(
+                    *(column.tolist() for column in columns)
+                )
+            )
+    FollowSuggestion.objects.filter(updated__lt=started).delete()
+    bump_versions(SUGGESTIONS_SCOPE)
+    return graph.size, graph.edges
+
+
+def suggestions_for(user, limit=None):
+    """Готовые рекомендации пользователя одним запросом по индексу.
+
+    Авторы, на которых он подписался после расчёта, отбрасываются.
+    """
+    return list(
+        FollowSuggestion.objects.filter(user=user)
+        .exclude(
+            author_id__in=Follow.objects.filter(user=user).values('author_id')
+        )
+        .select_related('author')
+        .order_by('rank')[:limit or settings.SUGGESTIONS_SHOWN]
+    )
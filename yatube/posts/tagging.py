@@ -0,0 +1,108 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Mention, Post, PostTag
+from .rendering import TAG_RE
+
+User = get_user_model()
+
+# Символы имени пользователя Django; точка в конце — знак препинания.
+MENTION_RE = re.compile(r'(?<![\w.@+-])@([\w.@+-]{1,150})')
+
+
+def parse_tags(text):
+    return {tag.lower() for tag in TAG_RE.findall(text)}
+
+
+def parse_mentions(text):
+    return {
+        username.rstrip('.') for username in MENTION_RE.findall(text)
+    } - {''}
+
+
+def _index_rows(posts):
+    """Строки индекса для постов: имена разрешаются одним запросом."""
+    parsed = [
+        (post, parse_tags(post.text), parse_mentions(post.text))
+        for post in posts
+    ]
+    usernames = set().union(*(mentions for _, _, mentions in parsed))
+    user_ids = dict(
+        User.objects.filter(username__in=usernames)
+        .values_list('username', 'pk')
+    ) if usernames else {}
+    tags, mentions = [], []
+    for post, post_tags, post_mentions in parsed:
+        tags += [
+            PostTag(tag=tag, post_id=post.pk, pub_date=post.pub_date)
+            for tag in post_tags
+        ]
+        mentions += [
+            Mention(
+                user_id=user_ids[username],
+                post_id=post.pk,
+                pub_date=post.pub_date,
+            )
+            for username in post_mentions
+            if username in user_ids
+        ]
+    return tags, mentions
+
+
+def index_post(post):
+    """Привести строки индекса поста в соответствие с его текстом.
+
+    Удаляются и вставляются только изменившиеся теги и упоминания,
+    поэтому сохранение без правки текста обходится двумя чтениями.
+    """
+    tags, mentions = _index_rows([post])
+    wanted_tags = {row.tag for row in tags}
+    wanted_users = {row.user_id for row in mentions}
+    with transaction.atomic():
+        stored_tags = set(
+            PostTag.objects.filter(post=post).values_list('tag', flat=True)
+        )
+        stored_users = set(
+            Mention.objects.filter(post=post)
+            .values_list('user_id', flat=True)
+        )
+        if stored_tags - wanted_tags:
+            PostTag.objects.filter(
+                post=post, tag__in=stored_tags - wanted_tags
+            ).delete()
+        if stored_users - wanted_users:
+            Mention.objects.filter(
+                post=post, user_id__in=stored_users - wanted_users
+            ).delete()
+        PostTag.objects.bulk_create(
+            row for row in tags if row.tag not in stored_tags
+        )
+        Mention.objects.bulk_create(
+            row for row in mentions if row.user_id not in stored_users
+        )
+
+
+def reindex(batch_size=1000):
+    """Перестроить индекс по всем постам пачками по первичному ключу.
+
+    Нужен для постов из bulk_create и созданных до появления индекса.
+    Возвращает число обработанных постов.
+    """
+    posts = Post.objects.order_by('pk').only('pk', 'text', 'pub_date')
+    indexed = 0
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return indexed
+        tags, mentions = _index_rows(batch)
+        post_ids = [post.pk for post in batch]
+        with transaction.atomic():
+            PostTag.objects.filter(post_id__in=post_ids).delete()
+            Mention.objects.filter(post_id__in=post_ids).delete()
+            PostTag.objects.bulk_create(tags)
+            Mention.objects.bulk_create(mentions)
+        indexed += len(batch)
+        last_pk = post_ids[-1]
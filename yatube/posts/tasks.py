@@ -0,0 +1,21 @@
+from sorl.thumbnail import get_thumbnail
+
+from tasks.registry import task
+
+from .models import Post
+
+# Регистрирует задачу удаления аккаунта при автопоиске модулей tasks.
+from .account_deletion import delete_account_batch  # noqa: E402, F401
+
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task
+def make_post_thumbnail(post_id):
+    """Заранее создать миниатюру картинки поста для лент и страницы поста."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        get_thumbnail(
+            post.image, POST_THUMBNAIL_GEOMETRY, **POST_THUMBNAIL_OPTIONS
+        )
@@ -0,0 +1,130 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from tasks.worker import run_next
+
+from ..cache_warming import get_hot_urls
+from ..feed_cache import feed_cache_key
+from ..models import (AccountDeletion, Comment, Follow, Group, GroupStats,
+                      Post, PostScore)
+from ..scope_versions import INDEX_SCOPE, get_versions
+
+User = get_user_model()
+
+
+class WarmCacheCommandTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='popular')
+        group = Group.objects.create(
+            title='Test group',
+            description='test description',
+            slug='test-group'
+        )
+        Post.objects.create(text='warm post', author=user, group=group)
+
+    def test_warm_cache_renders_hot_urls(self):
+        """Команда рендерит популярные страницы и заполняет кэш ленты."""
+        out = StringIO()
+        call_command('warm_cache', '--workers', '2', stdout=out)
+        output = out.getvalue()
+
+        self.assertIn('200', output)
+        self.assertIn('/group/test-group/', output)
+        self.assertIn('/profile/popular/', output)
+        versions = get_versions(INDEX_SCOPE)
+        self.assertIsNotNone(
+            cache.get(feed_cache_key('index_page', 1, versions))
+        )
+
+    def test_hot_groups_are_ranked_by_stats(self):
+        """Популярные группы берутся из счётчиков GroupStats."""
+        busy = Group.objects.create(
+            title='Busy group', description='-', slug='busy-group'
+        )
+        GroupStats.objects.filter(group=busy).update(posts_count=10)
+
+        with self.assertNumQueries(2):
+            urls = get_hot_urls(1, 1, 1)
+
+        self.assertIn('/group/busy-group/', urls)
+        self.assertNotIn('/group/test-group/', urls)
+
+
+@override_settings(ACCOUNT_DELETION_BATCH_SIZE=2)
+class DeleteAccountTests(TestCase):
+    def setUp(self):
+        self.leaving = User.objects.create_user(username='leaving')
+        self.staying = User.objects.create_user(username='staying')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        self.kept = Post.objects.create(
+            text='kept', author=self.staying, group=self.group
+        )
+        posts = [
+            Post.objects.create(
+                text='gone #tag @staying', author=self.leaving,
+                group=self.group
+            )
+            for _ in range(3)
+        ]
+        for post in posts + [self.kept]:
+            Comment.objects.create(post=post, author=self.leaving, text='c')
+            Comment.objects.create(post=post, author=self.staying, text='c')
+        Follow.objects.create(user=self.leaving, author=self.staying)
+        Follow.objects.create(user=self.staying, author=self.leaving)
+
+    def run_queue(self):
+        batches = 0
+        while run_next():
+            batches += 1
+        return batches
+
+    def test_account_deleted_in_batches(self):
+        """Аккаунт удаляется пачками, чужой контент не затронут."""
+        out = StringIO()
+        call_command('delete_account', 'leaving', stdout=out)
+        self.assertIn('leaving: В очереди, 0%', out.getvalue())
+        self.assertFalse(User.objects.get(username='leaving').is_active)
+
+        batches = self.run_queue()
+
+        deletion = AccountDeletion.objects.get(username='leaving')
+        self.assertEqual(deletion.status, AccountDeletion.DONE)
+        self.assertEqual(deletion.rows_deleted, deletion.rows_total)
+        self.assertEqual(deletion.rows_total, 12)
+        self.assertEqual(batches, deletion.batches)
+        self.assertGreater(batches, 5)
+        self.assertFalse(User.objects.filter(username='leaving').exists())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertEqual(
+            list(Comment.objects.values_list('author__username', flat=True)),
+            ['staying'],
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(
+            list(PostScore.objects.values_list('post', flat=True)),
+            [self.kept.pk],
+        )
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_post_id, self.kept.pk)
+
+    def test_batch_is_bounded(self):
+        call_command('delete_account', 'leaving', stdout=StringIO())
+        run_next()
+        run_next()
+        deletion = AccountDeletion.objects.get()
+        self.assertEqual(deletion.status, AccountDeletion.RUNNING)
+        self.assertEqual(deletion.rows_deleted, 4)
+
+    def test_repeated_request_is_idempotent(self):
+        call_command('delete_account', 'leaving', stdout=StringIO())
+        call_command('delete_account', 'leaving', stdout=StringIO())
+        batches = self.run_queue()
+        self.assertEqual(batches, AccountDeletion.objects.get().batches)
@@ -8,6 +8,8 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from tasks.models import Task
+
 from ..models import Comment, Group, Post
 
 User = get_user_model()
@@ -113,6 +115,12 @@ class PostFormTests(TestCase):
             ).exists()
         )
         self.assertEqual(Post.objects.count(), posts_count + 1)
+        self.assertTrue(
+            Task.objects.filter(
+                name='posts.tasks.make_post_thumbnail',
+                idempotency_key='thumbnail:posts/small.gif'
+            ).exists()
+        )
 
     def test_authorized_user_can_create_comment(self):
         """Тест, проверяющий создание комментария авторизованным юзером."""
@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
 from ..models import Comment, Group, Post
+from ..rendering import post_preview_html
 
 User = get_user_model()
 
@@ -39,3 +43,51 @@ class PostModelTest(TestCase):
         for model, string in model_and_its_string:
             with self.subTest(model=model):
                 self.assertEqual(str(model), string)
+
+
+@override_settings(POST_PREVIEW_CHARS=20)
+class RenderedHtmlTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer')
+
+    def test_html_rendered_on_save(self):
+        """HTML текста экранируется и обновляется вместе с текстом."""
+        post = Post.objects.create(
+            author=self.user, text='<b>жирный</b>\nвторая строка ' * 3
+        )
+        self.assertIn('&lt;b&gt;жирный&lt;/b&gt;<br>', post.text_html)
+        self.assertTrue(post.text_html.startswith('<p>'))
+        self.assertIn('<br>', post.preview_html)
+        self.assertTrue(post.preview_html.endswith('…'))
+
+        post.text = 'новый текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>новый текст</p>')
+        self.assertEqual(post.preview_html, 'новый текст')
+
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='a & b\nc'
+        )
+        self.assertEqual(comment.text_html, 'a &amp; b<br>c')
+
+    def test_preview_of_bulk_created_row_is_truncated(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='слово ' * 20)]
+        )
+        post = Post.objects.get()
+        self.assertEqual(post.preview_html, '')
+        self.assertEqual(
+            post.get_preview_html(), post_preview_html('слово ' * 20)
+        )
+        self.assertTrue(post.get_preview_html().endswith('…'))
+
+    def test_backfill_fills_bulk_created_rows(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='из bulk_create')]
+        )
+        self.assertEqual(Post.objects.get().text_html, '')
+        call_command('render_html', stdout=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(post.text_html, '<p>из bulk_create</p>')
+        self.assertEqual(post.preview_html, 'из bulk_create')
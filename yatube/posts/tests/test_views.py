@@ -1,14 +1,32 @@
+import math
+from datetime import timedelta
+from http import HTTPStatus
+from urllib.parse import quote
+
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import caches
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+
+from core.asgi_adapter import ASYNC_STREAMS
 
-from ..models import Comment, Group, Post, Follow
+from ..feed_cache import feed_cache_key
+from ..group_stats import rebuild_all
+from ..models import (Comment, Follow, FollowSuggestion, Group, GroupStats,
+                      Mention, Post, PostScore, PostTag)
+from ..new_posts import ChannelPoller, broker
+from ..popularity import add_engagement, compact, rebuild
+from ..scope_versions import INDEX_SCOPE, author_scope, get_versions
+from ..sitemaps import CONTENT_TYPE, shard_of
+from ..suggestions import rebuild as rebuild_suggestions
+from ..tagging import reindex
 
 User = get_user_model()
 cache = caches['default']
+ASGI_ENVIRON = {ASYNC_STREAMS: True}
 
 
 class TestPosts(TestCase):
@@ -251,9 +269,10 @@ class TestPosts(TestCase):
         """Проверка хранения и очищения кэша для index."""
         response_old = self.authorized_client.get(reverse('posts:index'))
         old_posts = response_old.content
-        Post.objects.create(
-            text='test_new_post',
-            author=TestPosts.user,
+        # update() не шлёт сигналов и не меняет версию ленты, поэтому
+        # страница отдаётся из кэша, пока его не очистят.
+        Post.objects.filter(author=TestPosts.user).update(
+            text='test_new_post', preview_html='test_new_post'
         )
         response = self.authorized_client.get(reverse('posts:index'))
         posts = response.content
@@ -314,3 +333,761 @@ class FollowTests(TestCase):
             reverse('posts:follow_index')
         )
         self.assertNotContains(response, 'test text')
+
+
+class ProfileHeaderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Post.objects.bulk_create(
+            Post(text=f'post {num}', author=cls.author) for num in range(3)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.profile_url = reverse(
+            'posts:profile',
+            kwargs={'username': cls.author.username}
+        )
+
+    def test_profile_header_stats(self):
+        """Шапка профиля содержит счётчики и признак подписки."""
+        client = Client()
+        client.force_login(ProfileHeaderTests.reader)
+        response = client.get(ProfileHeaderTests.profile_url)
+        author = response.context['author']
+
+        self.assertEqual(author.posts_count, 3)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.following_count, 0)
+        self.assertTrue(response.context['following'])
+
+    def test_profile_header_query_count(self):
+        """Профиль: автор с версиями для ETag и страница постов."""
+        with self.assertNumQueries(2):
+            Client().get(ProfileHeaderTests.profile_url)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Test group',
+            description='test description',
+            slug='test-group'
+        )
+        cls.post = Post.objects.create(
+            text='test post',
+            author=cls.user,
+            group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_unchanged_pages_answer_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304."""
+        for url in ConditionalGetTests.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_new_comment_changes_post_etag(self):
+        """Новый комментарий меняет ETag страницы поста."""
+        url = ConditionalGetTests.urls[-1]
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=ConditionalGetTests.post,
+            author=ConditionalGetTests.user,
+            text='new comment'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_group_edit_changes_group_etag(self):
+        """Новое название группы видно сразу, а не по старому ETag."""
+        url = ConditionalGetTests.urls[1]
+        etag = self.client.get(url)['ETag']
+        group = Group.objects.get(pk=ConditionalGetTests.group.pk)
+        group.title = 'Renamed group'
+        group.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Renamed group')
+
+    def test_author_edit_changes_profile_etag(self):
+        """Новое имя автора видно в профиле сразу."""
+        url = ConditionalGetTests.urls[2]
+        etag = self.client.get(url)['ETag']
+        author = User.objects.get(pk=ConditionalGetTests.user.pk)
+        author.first_name = 'Renamed'
+        author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Renamed')
+
+    def test_login_keeps_profile_etag(self):
+        """Вход обновляет только last_login и версию автора не трогает."""
+        url = ConditionalGetTests.urls[2]
+        etag = self.client.get(url)['ETag']
+        Client().force_login(ConditionalGetTests.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_etag_depends_on_user(self):
+        """Пользователи с разными сессиями получают разные ETag."""
+        url = ConditionalGetTests.urls[0]
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(ConditionalGetTests.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cached_reader')
+        Post.objects.create(text='cached post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedCacheTests.user)
+
+    def test_feed_cache_is_shared_but_header_is_personal(self):
+        """Лента из кэша общая, а шапка рендерится для каждого юзера."""
+        Client().get(reverse('posts:index'))
+        with self.assertNumQueries(3):
+            # Версия ленты, сессия и пользователь; постов не читаем.
+            response = self.authorized_client.get(reverse('posts:index'))
+
+        self.assertContains(response, 'cached post')
+        self.assertContains(response, FeedCacheTests.user.username)
+        self.assertContains(response, reverse('posts:follow_index'))
+
+    def test_new_post_changes_cached_feed_and_etag(self):
+        """Под новым ETag отдаётся лента уже с новым постом."""
+        url = reverse('posts:index')
+        etag = self.authorized_client.get(url)['ETag']
+        Post.objects.create(text='fresh post', author=FeedCacheTests.user)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'fresh post')
+
+    def test_page_parameter_is_validated_for_cache_key(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url, {'page': 'junk'})
+        versions = get_versions(INDEX_SCOPE)
+        self.assertIsNotNone(
+            cache.get(feed_cache_key('index_page', 1, versions))
+        )
+        with self.settings(FEED_CACHE_PAGES=3):
+            self.authorized_client.get(url, {'page': 99})
+        self.assertIsNone(
+            cache.get(feed_cache_key('index_page', 99, versions))
+        )
+
+
+@override_settings(SSE_WAIT_TIMEOUT=0)
+class NewPostsEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='streamer')
+        cls.first = Post.objects.create(text='first', author=cls.user)
+        cls.second = Post.objects.create(text='second', author=cls.user)
+        cls.url = reverse('posts:new_posts_events')
+
+    def read_stream(self, *args, **kwargs):
+        response = self.client.get(*args, **kwargs, **ASGI_ENVIRON)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_first_connection_gets_latest_id(self):
+        """Первое подключение получает id последнего поста."""
+        content = self.read_stream(NewPostsEventsTests.url)
+
+        self.assertIn(f'id: {NewPostsEventsTests.second.pk}', content)
+        self.assertIn('event: sync', content)
+
+    def test_new_posts_are_counted(self):
+        """Клиент узнаёт, сколько постов появилось после Last-Event-ID."""
+        content = self.read_stream(
+            NewPostsEventsTests.url,
+            {'cards': 1},
+            HTTP_LAST_EVENT_ID=str(NewPostsEventsTests.first.pk)
+        )
+
+        self.assertIn('event: new-posts', content)
+        self.assertIn('"count": 1', content)
+        self.assertIn('second', content)
+
+    def test_stream_closes_without_new_posts(self):
+        """Без новых постов поток закрывается после ожидания."""
+        content = self.read_stream(
+            NewPostsEventsTests.url,
+            HTTP_LAST_EVENT_ID=str(NewPostsEventsTests.second.pk)
+        )
+
+        self.assertNotIn('event:', content)
+
+    def test_follow_feed_requires_login(self):
+        """Поток ленты подписок недоступен анониму."""
+        response = self.client.get(
+            NewPostsEventsTests.url, {'feed': 'follow'}, **ASGI_ENVIRON
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_no_stream_under_wsgi(self):
+        """Под WSGI поток не отдаётся и страницы его не открывают."""
+        response = self.client.get(NewPostsEventsTests.url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        events = NewPostsEventsTests.url
+        self.assertNotContains(self.client.get(reverse('posts:index')), events)
+        self.assertContains(
+            self.client.get(reverse('posts:index'), **ASGI_ENVIRON), events
+        )
+
+
+@override_settings(SSE_POLL_INTERVAL=60)
+class ChannelPollerTests(TestCase):
+    def setUp(self):
+        self.poller = ChannelPoller()
+        self.author = User.objects.create_user(username='poller')
+
+    def test_channel_is_polled_once_per_interval(self):
+        with self.assertNumQueries(1):
+            self.poller.check([INDEX_SCOPE])
+            self.poller.check([INDEX_SCOPE])
+
+    def test_channels_of_one_kind_share_a_query(self):
+        with self.assertNumQueries(2):
+            self.poller.check([
+                INDEX_SCOPE, author_scope(1), author_scope(2),
+                author_scope(self.author.pk),
+            ])
+
+    @override_settings(SSE_POLL_INTERVAL=0)
+    def test_post_from_other_process_is_published(self):
+        """Пост, созданный мимо шины процесса, будит ждущих."""
+        channels = [INDEX_SCOPE, author_scope(self.author.pk)]
+        self.poller.check(channels)
+        after = broker.sequence
+        Post.objects.bulk_create([Post(text='elsewhere', author=self.author)])
+
+        self.poller.check(channels)
+
+        self.assertTrue(broker.changed(channels, after))
+
+
+class PopularFeedTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.reader = User.objects.create_user(username='reader')
+        self.quiet = Post.objects.create(text='quiet', author=self.author)
+        self.talked = Post.objects.create(text='talked', author=self.author)
+        self.followed = Post.objects.create(text='followed', author=self.other)
+
+    def popular_texts(self):
+        response = self.client.get(reverse('posts:popular'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_comments_raise_post(self):
+        """Комментарии поднимают пост в популярной ленте."""
+        Comment.objects.create(
+            post=self.talked, author=self.reader, text='comment'
+        )
+        self.assertEqual(self.popular_texts()[0], 'talked')
+
+    def test_follow_raises_latest_post_of_author(self):
+        Comment.objects.create(
+            post=self.talked, author=self.reader, text='comment'
+        )
+        Follow.objects.create(user=self.reader, author=self.other)
+        self.assertEqual(self.popular_texts()[0], 'followed')
+
+    def test_equal_scores_are_ordered_by_date(self):
+        """При равном score порядок ленты стабилен: новые посты выше."""
+        PostScore.objects.update(score=1.0)
+        self.assertEqual(
+            self.popular_texts(), ['followed', 'talked', 'quiet']
+        )
+
+    def test_old_engagement_decays(self):
+        """Давние комментарии весят меньше одного свежего."""
+        long_ago = timezone.now() - timedelta(days=10)
+        for _ in range(5):
+            add_engagement(self.quiet.pk, 'comment', long_ago)
+        Comment.objects.create(
+            post=self.talked, author=self.reader, text='comment'
+        )
+        self.assertEqual(self.popular_texts()[0], 'talked')
+        scores = dict(PostScore.objects.values_list('post', 'score'))
+        self.assertLess(
+            scores[self.quiet.pk] - scores[self.followed.pk],
+            math.log(1.02)
+        )
+
+    def test_compact_removes_decayed_posts(self):
+        later = timezone.now() + timedelta(days=30)
+        Comment.objects.create(
+            post=self.talked, author=self.reader, text='comment'
+        )
+        add_engagement(self.talked.pk, 'comment', later)
+        self.assertEqual(compact(now=later), 2)
+        self.assertEqual(
+            list(PostScore.objects.values_list('post_id', flat=True)),
+            [self.talked.pk]
+        )
+
+    def test_rebuild_matches_incremental_scores(self):
+        """Пересчёт по истории даёт те же score, что и сигналы."""
+        Comment.objects.create(
+            post=self.talked, author=self.reader, text='comment'
+        )
+        incremental = dict(PostScore.objects.values_list('post', 'score'))
+        self.assertEqual(rebuild(days=1), 3)
+        rebuilt = dict(PostScore.objects.values_list('post', 'score'))
+        self.assertEqual(rebuilt.keys(), incremental.keys())
+        for post_id, score in rebuilt.items():
+            self.assertAlmostEqual(score, incremental[post_id])
+
+
+class GroupIndexTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.groups = [
+            Group.objects.create(
+                title=f'Группа {num}', slug=f'group-{num}', description='-'
+            )
+            for num in range(5)
+        ]
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_follow_post_writes(self):
+        """Сводка группы меняется при создании, переносе и удалении."""
+        first, second = self.groups[:2]
+        old = Post.objects.create(text='old', author=self.author, group=first)
+        new = Post.objects.create(text='new', author=self.author, group=first)
+        self.assertEqual(self.stats(first).posts_count, 2)
+        self.assertEqual(self.stats(first).last_post_id, new.pk)
+
+        new.group = second
+        new.save()
+        self.assertEqual(self.stats(first).posts_count, 1)
+        self.assertEqual(self.stats(first).last_post_id, old.pk)
+        self.assertEqual(self.stats(second).last_post_id, new.pk)
+
+        old.delete()
+        stats = self.stats(first)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post_id)
+        self.assertIsNone(stats.last_post_at)
+
+    def test_directory_sorted_by_activity_with_cursor(self):
+        """Пустые группы идут в конце, курсор проходит их все."""
+        for group in (self.groups[1], self.groups[3]):
+            Post.objects.create(text='p', author=self.author, group=group)
+        url = reverse('posts:group_index')
+        seen = []
+        cursor = None
+        with self.settings(GROUPS_PER_PAGE=2):
+            while True:
+                params = {'cursor': cursor} if cursor else {}
+                response = self.client.get(url, params)
+                seen += [stats.group for stats in response.context['groups']]
+                cursor = response.context['next_cursor']
+                if cursor is None:
+                    break
+        self.assertEqual(seen[:2], [self.groups[3], self.groups[1]])
+        self.assertCountEqual(seen, self.groups)
+
+    def test_next_link_keeps_sort(self):
+        with self.settings(GROUPS_PER_PAGE=2):
+            response = self.client.get(
+                reverse('posts:group_index'), {'sort': 'posts'}
+            )
+        cursor = response.context['next_cursor']
+        self.assertContains(
+            response, f'href="?sort=posts&cursor={quote(cursor)}"'
+        )
+
+    def test_directory_query_count(self):
+        """Число запросов не зависит от числа групп."""
+        for group in self.groups:
+            Post.objects.create(text='p', author=self.author, group=group)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:group_index'), {'sort': 'posts'})
+
+    def test_rebuild_matches_signals(self):
+        for group in self.groups[:3]:
+            Post.objects.create(text='p', author=self.author, group=group)
+        before = list(GroupStats.objects.order_by('group').values())
+        rebuild_all()
+        after = list(GroupStats.objects.order_by('group').values())
+        self.assertEqual(after, before)
+
+
+class SyndicationFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(
+            title='Test group',
+            description='test description',
+            slug='test-group'
+        )
+        Post.objects.create(
+            text='grouped post', author=cls.user, group=cls.group
+        )
+        cls.urls = {
+            'posts:index_rss': {},
+            'posts:index_atom': {},
+            'posts:group_rss': {'slug': cls.group.slug},
+            'posts:group_atom': {'slug': cls.group.slug},
+            'posts:profile_rss': {'username': cls.user.username},
+            'posts:profile_atom': {'username': cls.user.username},
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_contain_posts(self):
+        """Все ленты отдают пост в своём формате."""
+        for name, kwargs in SyndicationFeedTests.urls.items():
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, kwargs=kwargs))
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                kind = 'atom' if name.endswith('atom') else 'rss'
+                self.assertIn(kind, response['Content-Type'])
+                self.assertContains(response, 'grouped post')
+
+    def test_unchanged_feed_answers_not_modified(self):
+        url = reverse('posts:index_rss')
+        response = self.client.get(url)
+        repeated = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(repeated.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_feed_cached_until_scope_changes(self):
+        """Повтор берётся из кэша, новый пост даёт свежую ленту."""
+        url = reverse('posts:profile_rss', args=[self.user.username])
+        self.client.get(url)
+        # Только автор вместе с версиями, без выборки постов.
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        Post.objects.create(text='fresh post', author=self.user)
+        self.assertContains(self.client.get(url), 'fresh post')
+
+    def test_cached_feeds_follow_group_and_author_edits(self):
+        """Кэш фидов группы и автора сбрасывается при их правке."""
+        group_url = reverse('posts:group_rss', args=[self.group.slug])
+        author_url = reverse('posts:profile_rss', args=[self.user.username])
+        self.client.get(group_url)
+        self.client.get(author_url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Renamed group'
+        group.save()
+        author = User.objects.get(pk=self.user.pk)
+        author.first_name = 'Renamed'
+        author.last_name = 'Writer'
+        author.save()
+        self.assertContains(self.client.get(group_url), 'Renamed group')
+        self.assertContains(self.client.get(author_url), 'Renamed Writer')
+
+    def test_cached_feed_keeps_requested_host(self):
+        """Абсолютные ссылки ленты не берутся из кэша другого хоста."""
+        url = reverse('posts:index_rss')
+        self.client.get(url, HTTP_HOST='localhost')
+        response = self.client.get(url, HTTP_HOST='127.0.0.1', secure=True)
+        self.assertContains(response, 'https://127.0.0.1/')
+        self.assertNotContains(response, 'localhost')
+
+    def test_unknown_group_feed_is_404(self):
+        response = self.client.get(
+            reverse('posts:group_atom', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2)
+class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='mapped')
+        self.group = Group.objects.create(
+            title='Группа', slug='mapped-group', description='-'
+        )
+        self.posts = [
+            Post.objects.create(text='p', author=self.author, group=self.group)
+            for _ in range(3)
+        ]
+
+    def shard_url(self, post):
+        return reverse('posts:sitemap', args=['posts', shard_of(post.pk)])
+
+    def test_index_lists_every_shard(self):
+        response = self.client.get(reverse('posts:sitemap_index'))
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        for post in self.posts:
+            self.assertContains(response, self.shard_url(post), count=1)
+        self.assertContains(
+            response, reverse('posts:sitemap', args=['groups', 0])
+        )
+        self.assertContains(
+            response, reverse('posts:sitemap', args=['profiles', 0])
+        )
+
+    def test_shards_cover_all_posts_once(self):
+        urls = {self.shard_url(post) for post in self.posts}
+        body = ''.join(
+            self.client.get(url).content.decode() for url in urls
+        )
+        for post in self.posts:
+            detail = reverse('posts:post_detail', args=[post.pk])
+            self.assertEqual(body.count(f'{detail}</loc>'), 1)
+
+    def test_new_post_invalidates_only_its_shard(self):
+        """Новый пост меняет только свой шард, старые отвечают 304."""
+        old_url = self.shard_url(self.posts[0])
+        etag = self.client.get(old_url)['ETag']
+        post = Post.objects.create(text='new', author=self.author)
+        self.assertNotEqual(shard_of(post.pk), shard_of(self.posts[0].pk))
+        response = self.client.get(old_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertContains(
+            self.client.get(self.shard_url(post)),
+            reverse('posts:post_detail', args=[post.pk])
+        )
+
+    def test_shard_served_from_cache(self):
+        url = self.shard_url(self.posts[0])
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_unknown_section_is_404(self):
+        response = self.client.get(
+            reverse('posts:sitemap', args=['comments', 0])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_shard_past_the_last_is_404_until_filled(self):
+        shard = shard_of(self.posts[-1].pk) + 1
+        url = reverse('posts:sitemap', args=['posts', shard])
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.NOT_FOUND
+        )
+        for _ in range(4):
+            Post.objects.create(text='p', author=self.author)
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, '<loc>')
+
+
+class RenderedHtmlViewTests(TestCase):
+    """Готовый HTML выводится как разметка, а не экранированным текстом."""
+    text = 'line one\nline two #tag & more'
+    card = ('line one<br>line two <a href="/tags/tag/">#tag</a> '
+            '&amp; more')
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer')
+        self.group = Group.objects.create(
+            title='Группа', slug='html-group', description='-'
+        )
+
+    def test_cards_render_markup(self):
+        Post.objects.create(
+            text=self.text, author=self.author, group=self.group
+        )
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        client = Client()
+        client.force_login(reader)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(client.get(url), self.card, html=True)
+
+    def test_bulk_created_rows_render_markup(self):
+        """Пустой готовый HTML заменяется рендером на лету везде."""
+        Post.objects.bulk_create(
+            [Post(text=self.text, author=self.author)]
+        )
+        post = Post.objects.get()
+        Comment.objects.bulk_create(
+            [Comment(text='a\nb', author=self.author, post=post)]
+        )
+        self.assertContains(
+            self.client.get(reverse('posts:index')), self.card, html=True
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(
+            response,
+            '<p>line one<br>line two <a href="/tags/tag/">#tag</a> '
+            '&amp; more</p>',
+            html=True,
+        )
+        self.assertContains(response, '<p>a<br>b</p>', html=True)
+        self.assertNotContains(response, '&lt;')
+
+
+class TagFeedTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader.one')
+
+    def test_index_follows_post_text(self):
+        """Индекс обновляется при создании и правке текста поста."""
+        post = Post.objects.create(
+            text='#Django и #python, спасибо @reader.one.', author=self.author
+        )
+        self.assertCountEqual(
+            PostTag.objects.values_list('tag', flat=True),
+            ['django', 'python'],
+        )
+        self.assertEqual(Mention.objects.get().user, self.reader)
+        self.assertIn(reverse('posts:tag_feed', args=['django']),
+                      post.text_html)
+
+        post.text = '#python &#39; @nobody'
+        post.save()
+        self.assertEqual(
+            list(PostTag.objects.values_list('tag', flat=True)), ['python']
+        )
+        self.assertFalse(Mention.objects.exists())
+
+    def test_tag_feed_walks_pages_by_cursor(self):
+        posts = [
+            Post.objects.create(text=f'#news {num}', author=self.author)
+            for num in range(5)
+        ]
+        Post.objects.create(text='без тега', author=self.author)
+        url = reverse('posts:tag_feed', args=['NEWS'])
+        seen = []
+        cursor = None
+        with self.settings(POST_PER_PAGE=2):
+            while True:
+                params = {'cursor': cursor} if cursor else {}
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, params)
+                seen += response.context['posts']
+                cursor = response.context['next_cursor']
+                if cursor is None:
+                    break
+        self.assertEqual(seen, posts[::-1])
+
+    def test_mentions_feed(self):
+        post = Post.objects.create(
+            text='привет, @reader.one', author=self.author
+        )
+        response = self.client.get(
+            reverse('posts:mentions', args=[self.reader.username])
+        )
+        self.assertEqual(response.context['posts'], [post])
+        response = self.client.get(reverse('posts:mentions', args=['ghost']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_reindex_covers_bulk_created_posts(self):
+        Post.objects.bulk_create([
+            Post(text='#bulk для @reader.one', author=self.author)
+        ])
+        self.assertFalse(PostTag.objects.exists())
+        self.assertEqual(reindex(batch_size=1), 1)
+        self.assertEqual(PostTag.objects.get().tag, 'bulk')
+        self.assertEqual(Mention.objects.get().user, self.reader)
+
+
+class FollowSuggestionTests(TestCase):
+    def setUp(self):
+        self.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'writer', 'friend', 'star', 'fan')
+        }
+        self.client.force_login(self.users['reader'])
+
+    def follow(self, user, *authors):
+        for author in authors:
+            Follow.objects.create(
+                user=self.users[user], author=self.users[author]
+            )
+
+    def suggested(self, url):
+        return [
+            suggestion.author.username
+            for suggestion in self.client.get(url).context['suggestions']
+        ]
+
+    def test_stored_suggestions_shown_without_followed(self):
+        """Подписка после расчёта убирает автора из рекомендаций."""
+        for rank, name in enumerate(('star', 'friend')):
+            FollowSuggestion.objects.create(
+                user=self.users['reader'], author=self.users[name],
+                score=1, rank=rank, updated=timezone.now(),
+            )
+        url = reverse('posts:follow_index')
+        self.assertEqual(self.suggested(url), ['star', 'friend'])
+        self.follow('reader', 'star')
+        self.assertEqual(self.suggested(url), ['friend'])
+        # Сессия, пользователь, счётчик пустой ленты и рекомендации.
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_rebuild_ranks_friends_of_friends(self):
+        self.follow('reader', 'writer')
+        self.follow('writer', 'friend', 'star')
+        self.follow('fan', 'writer', 'star')
+        own_profile = reverse('posts:profile', args=['reader'])
+        etag = self.client.get(own_profile)['ETag']
+
+        rebuild_suggestions()
+
+        # star: через writer и через fan, читающего того же автора.
+        self.assertEqual(self.suggested(own_profile), ['star', 'friend'])
+        response = self.client.get(own_profile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn(
+            'suggestions',
+            self.client.get(reverse('posts:profile', args=['fan'])).context,
+        )
+
+        Follow.objects.filter(user=self.users['reader']).delete()
+        rebuild_suggestions()
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=self.users['reader'])
+        )
@@ -1,17 +1,46 @@
 from django.urls import path
 
-from . import views
+from . import feeds, sitemaps, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('rss/', feeds.index_rss, name='index_rss'),
+    path('atom/', feeds.index_atom, name='index_atom'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap_index'),
+    path(
+        'sitemap-<str:section>-<int:shard>.xml',
+        sitemaps.sitemap,
+        name='sitemap'
+    ),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_list, name='group_list'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.profile_rss,
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.profile_atom,
+        name='profile_atom'
+    ),
+    path(
+        'profile/<str:username>/mentions/',
+        views.mentions,
+        name='mentions'
+    ),
+    path('tags/<str:tag>/', views.tag_feed, name='tag_feed'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('popular/', views.popular, name='popular'),
+    path('events/', views.new_posts_events, name='new_posts_events'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,26 +1,55 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import (Http404, HttpResponse, HttpResponseForbidden,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.asgi_adapter import serves_async_streams
+from core.pagination import InvalidCursor, paginate_by_cursor
+
+from .conditional import (conditional_on, get_request_versions,
+                          group_scopes, index_scopes, post_scopes,
+                          profile_scopes)
+from .feed_cache import get_cached_feed
 from .forms import CommentForm, PostForm
 from .get_page_context import get_page_context
-from .models import Follow, Group, Post
+from .models import (Follow, Group, GroupStats, Mention, Post, PostScore,
+                     PostTag)
+from .new_posts import NewPostsStream
+from .popularity import popular_posts
+from .profile_header import get_profile_author
+from .scope_versions import INDEX_SCOPE, author_scope, group_scope
+from .suggestions import suggestions_for
+from .tasks import make_post_thumbnail
 
 User = get_user_model()
 
+INDEX_FEED_ORDERING = ('-pub_date', '-post_id')
+
+GROUP_SORTS = {
+    'activity': ('-last_post_at', '-group_id'),
+    'posts': ('-posts_count', '-group_id'),
+}
 
-@cache_page(20, key_prefix='index_page')
+
+@conditional_on(index_scopes)
 def index(request) -> HttpResponse:
-    """Передать в шаблон index.html объекты модели Post."""
-    posts = Post.objects.all()
+    """Передать в шаблон index.html закэшированную ленту постов."""
+    def get_context():
+        posts = Post.objects.select_related('author', 'group')
+        return {'page_obj': get_page_context(request, posts)}
+
     context = {
-        'page_obj': get_page_context(request, posts)
+        'feed': get_cached_feed(
+            request, 'index_page', 20, get_context,
+            get_request_versions(request, index_scopes, {}),
+        )
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_on(group_scopes)
 def group_list(request, slug) -> HttpResponse:
     """Передать в шаблон group_list.html объекты модели Post."""
     group = get_object_or_404(Group, slug=slug)
@@ -32,23 +61,47 @@ def group_list(request, slug) -> HttpResponse:
     return render(request, 'posts/group_list.html', context)
 
 
+def group_index(request) -> HttpResponse:
+    """Каталог групп из готовых сводок, с курсорной пагинацией."""
+    sort = request.GET.get('sort')
+    if sort not in GROUP_SORTS:
+        sort = 'activity'
+    stats = GroupStats.objects.select_related('group', 'last_post__author')
+    try:
+        rows, cursor = paginate_by_cursor(
+            stats, request.GET.get('cursor'), settings.GROUPS_PER_PAGE,
+            GROUP_SORTS[sort]
+        )
+    except InvalidCursor:
+        rows, cursor = paginate_by_cursor(
+            stats, None, settings.GROUPS_PER_PAGE, GROUP_SORTS[sort]
+        )
+    context = {
+        'groups': rows,
+        'sort': sort,
+        'next_cursor': cursor,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@conditional_on(profile_scopes)
 def profile(request, username) -> HttpResponse:
-    author = get_object_or_404(User, username=username)
+    """Передать в шаблон profile.html автора, его статистику и посты."""
+    author = get_profile_author(request, username)
     posts = author.posts.select_related('author', 'group')
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author
-        ).exists()
-    else:
-        following = False
     context = {
-        'following': following,
+        'following': author.is_following,
         'author': author,
-        'page_obj': get_page_context(request, posts)
+        'page_obj': get_page_context(
+            request, posts, count=author.posts_count
+        )
     }
+    if author == request.user:
+        context['suggestions'] = suggestions_for(request.user)
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_on(post_scopes)
 def post_detail(request, post_id) -> HttpResponse:
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm()
@@ -69,6 +122,10 @@ def post_create(request) -> HttpResponse:
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            if post.image:
+                make_post_thumbnail.enqueue(
+                    post.pk, idempotency_key=f'thumbnail:{post.image.name}'
+                )
             return redirect('posts:profile', username=request.user)
         return render(request, 'posts/post_create.html', {'form': form})
     form = PostForm()
@@ -91,7 +148,11 @@ def post_edit(request, post_id) -> HttpResponse:
         'is_edit': True
     }
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if post.image and 'image' in form.changed_data:
+            make_post_thumbnail.enqueue(
+                post.pk, idempotency_key=f'thumbnail:{post.image.name}'
+            )
         return redirect('posts:post_detail', post_id)
     return render(request, 'posts/post_create.html', context)
 
@@ -108,10 +169,63 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def popular(request) -> HttpResponse:
+    """Посты по затухающей во времени вовлечённости."""
+    context = {
+        'page_obj': get_page_context(
+            request, popular_posts(), count=PostScore.objects.count()
+        )
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+def index_feed(request, rows, template, context):
+    """Лента по строкам инвертированного индекса с курсором.
+
+    Строки индекса сами хранят дату поста, поэтому страница — один
+    диапазон индекса с соединением только нужных постов.
+    """
+    rows = rows.select_related('post__author', 'post__group')
+    cursor = request.GET.get('cursor')
+    try:
+        page, next_cursor = paginate_by_cursor(
+            rows, cursor, settings.POST_PER_PAGE, INDEX_FEED_ORDERING
+        )
+    except InvalidCursor:
+        page, next_cursor = paginate_by_cursor(
+            rows, None, settings.POST_PER_PAGE, INDEX_FEED_ORDERING
+        )
+    context.update(
+        posts=[row.post for row in page], next_cursor=next_cursor
+    )
+    return render(request, template, context)
+
+
+def tag_feed(request, tag) -> HttpResponse:
+    """Посты с хэштегом, от новых к старым."""
+    tag = tag.lower()
+    return index_feed(
+        request, PostTag.objects.filter(tag=tag), 'posts/tag_feed.html',
+        {'tag': tag},
+    )
+
+
+def mentions(request, username) -> HttpResponse:
+    """Посты, в которых упомянут пользователь."""
+    author = get_object_or_404(User, username=username)
+    return index_feed(
+        request, Mention.objects.filter(user=author),
+        'posts/mentions.html', {'author': author},
+    )
+
+
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(author__following__user=request.user)
-    context = {'page_obj': get_page_context(request, posts)}
+    context = {
+        'page_obj': get_page_context(request, posts),
+        'suggestions': suggestions_for(request.user),
+    }
     return render(request, 'posts/follow.html', context)
 
 
@@ -129,3 +243,37 @@ def profile_unfollow(request, username):
     user = request.user
     Follow.objects.get(user=user, author__username=username).delete()
     return redirect('posts:profile', username=username)
+
+
+def new_posts_events(request):
+    """Поток server-sent events о новых постах ленты; только под ASGI."""
+    if not serves_async_streams(request):
+        raise Http404('Поток событий доступен только под ASGI')
+    feed = request.GET.get('feed', 'index')
+    if feed == 'group':
+        group = get_object_or_404(Group, slug=request.GET.get('slug'))
+        posts = group.group_posts.all()
+        channels = [group_scope(group.pk)]
+    elif feed == 'follow':
+        if not request.user.is_authenticated:
+            return HttpResponseForbidden()
+        authors = list(
+            Follow.objects.filter(user=request.user)
+            .values_list('author_id', flat=True)
+        )
+        posts = Post.objects.filter(author_id__in=authors)
+        channels = [author_scope(author_id) for author_id in authors]
+    else:
+        posts = Post.objects.all()
+        channels = [INDEX_SCOPE]
+    last_id = request.META.get('HTTP_LAST_EVENT_ID', request.GET.get('last'))
+    stream = NewPostsStream(
+        posts,
+        channels,
+        int(last_id) if last_id and last_id.isdigit() else None,
+        with_cards='cards' in request.GET,
+    )
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response.async_stream = stream.astream
+    response['Cache-Control'] = 'no-cache'
+    return response
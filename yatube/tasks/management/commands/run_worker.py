@@ -0,0 +1,47 @@
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.worker import work
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики фоновых задач из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int,
+            default=settings.TASKS_WORKER_PROCESSES
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет.'
+        )
+
+    def handle(self, *args, **options):
+        worker_options = {
+            'burst': options['burst'],
+            'poll_interval': options['poll_interval'],
+        }
+        if options['processes'] == 1:
+            work(**worker_options)
+            return
+        # Дочерние процессы не должны делить соединение родителя.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=work, kwargs=worker_options)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from tasks.worker import queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает глубину очереди задач и задержку их выполнения.'
+
+    def handle(self, *args, **options):
+        for name, value in queue_stats().items():
+            if isinstance(value, float):
+                value = f'{value:.3f} с'
+            self.stdout.write(f'{name}: {value}')
@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200)
+    arguments = models.TextField(default='{}')
+    idempotency_key = models.CharField(
+        max_length=255, unique=True, blank=True, null=True
+    )
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    available_at = models.DateTimeField(default=timezone.now)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('available_at',)
+        indexes = (
+            models.Index(fields=('status', 'available_at')),
+        )
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
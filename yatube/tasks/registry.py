@@ -0,0 +1,49 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Task
+
+registry = {}
+
+
+def enqueue(name, *args, idempotency_key=None, delay=0, **kwargs):
+    """Поставить задачу в очередь.
+
+    Задача с уже известным ключом идемпотентности повторно не ставится,
+    возвращается существующая запись.
+    """
+    fields = {
+        'name': name,
+        'arguments': json.dumps({'args': args, 'kwargs': kwargs}),
+        'max_attempts': settings.TASKS_MAX_ATTEMPTS,
+        'available_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if idempotency_key is None:
+        return Task.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(
+                idempotency_key=idempotency_key, **fields
+            )
+    except IntegrityError:
+        return Task.objects.get(idempotency_key=idempotency_key)
+
+
+def task(func):
+    """Зарегистрировать функцию как фоновую задачу.
+
+    Задача ставится в очередь вызовом func.enqueue(*args, **kwargs).
+    """
+    name = f'{func.__module__}.{func.__name__}'
+    registry[name] = func
+
+    def enqueue_task(*args, **kwargs):
+        return enqueue(name, *args, **kwargs)
+
+    func.task_name = name
+    func.enqueue = enqueue_task
+    return func
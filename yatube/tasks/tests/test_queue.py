@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Task
+from ..registry import enqueue, registry
+from ..worker import claim_task, queue_stats, run_next, run_task
+
+calls = []
+
+
+def remember(value):
+    calls.append(value)
+
+
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASKS_MAX_ATTEMPTS=2, TASKS_RETRY_DELAY=10)
+class TaskQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        registry['test.remember'] = remember
+        registry['test.explode'] = explode
+
+    @classmethod
+    def tearDownClass(cls):
+        del registry['test.remember']
+        del registry['test.explode']
+        super().tearDownClass()
+
+    def setUp(self):
+        calls.clear()
+
+    def test_task_is_executed(self):
+        """Обработчик выполняет задачу и помечает её выполненной."""
+        task = enqueue('test.remember', 42)
+
+        self.assertTrue(run_next())
+        self.assertFalse(run_next())
+        self.assertEqual(calls, [42])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertIn('latency_p95', queue_stats())
+
+    def test_idempotency_key_deduplicates(self):
+        """Задача с тем же ключом идемпотентности не дублируется."""
+        first = enqueue('test.remember', 1, idempotency_key='same')
+        second = enqueue('test.remember', 2, idempotency_key='same')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_failed_task_is_retried_then_failed(self):
+        """Упавшая задача откладывается и после всех попыток - ошибка."""
+        task = enqueue('test.explode')
+        run_next()
+        task.refresh_from_db()
+
+        self.assertEqual(task.status, Task.PENDING)
+        self.assertGreater(task.available_at, timezone.now())
+        self.assertIn('RuntimeError', task.last_error)
+
+        Task.objects.filter(pk=task.pk).update(available_at=timezone.now())
+        run_next()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+
+    def test_late_worker_does_not_overwrite_new_claim(self):
+        """Обработчик, потерявший захват, не трогает чужую попытку."""
+        enqueue('test.remember', 1)
+        late = claim_task()
+        Task.objects.filter(pk=late.pk).update(
+            available_at=timezone.now() - timedelta(seconds=1)
+        )
+        current = claim_task()
+
+        run_task(late)
+        current.refresh_from_db()
+
+        self.assertEqual(current.status, Task.RUNNING)
+        self.assertEqual(current.attempts, 2)
+
+    def test_task_becomes_visible_after_timeout(self):
+        """Задача упавшего обработчика снова видна после таймаута."""
+        enqueue('test.remember', 1)
+        task = claim_task()
+
+        self.assertIsNone(claim_task())
+        Task.objects.filter(pk=task.pk).update(
+            available_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(claim_task().pk, task.pk)
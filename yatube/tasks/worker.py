@@ -0,0 +1,144 @@
+import json
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, F
+from django.utils import timezone
+
+from core.stats import percentile
+
+from .models import Task
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+CLAIM_BATCH = 10
+
+
+def claim_task():
+    """Захватить очередную видимую задачу.
+
+    Захват продлевает видимость задачи на TASKS_VISIBILITY_TIMEOUT: если
+    обработчик упадёт, задача снова станет видна другим обработчикам.
+    """
+    now = timezone.now()
+    visible = Task.objects.filter(
+        status__in=(Task.PENDING, Task.RUNNING), available_at__lte=now
+    )
+    hidden_until = now + timedelta(
+        seconds=settings.TASKS_VISIBILITY_TIMEOUT
+    )
+    for pk in visible.values_list('pk', flat=True)[:CLAIM_BATCH]:
+        claimed = visible.filter(pk=pk).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            available_at=hidden_until,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def _owned(task):
+    """Задача, пока её захват всё ещё наш.
+
+    Каждый захват увеличивает attempts. Если обработчик работал дольше
+    TASKS_VISIBILITY_TIMEOUT и задачу захватил другой, номер попытки
+    уже не совпадёт, и запись о результате никого не перезапишет.
+    """
+    return Task.objects.filter(
+        pk=task.pk, status=Task.RUNNING, attempts=task.attempts
+    )
+
+
+def _finish(task, status, error=''):
+    now = timezone.now()
+    updated = _owned(task).update(
+        status=status, finished=now, last_error=error
+    )
+    if not updated:
+        logger.warning(
+            'Задача %s #%s: захват потерян, результат попытки %s не записан',
+            task.name, task.pk, task.attempts
+        )
+        return
+    logger.info(
+        'Задача %s #%s: %s за %.3f с после постановки',
+        task.name, task.pk, status, (now - task.created).total_seconds()
+    )
+
+
+def run_task(task):
+    """Выполнить захваченную задачу, при ошибке отложить повтор."""
+    if task.attempts > task.max_attempts:
+        _finish(task, Task.FAILED, task.last_error)
+        return False
+    arguments = json.loads(task.arguments)
+    try:
+        registry[task.name](*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s #%s упала:\n%s', task.name, task.pk, error)
+        if task.attempts >= task.max_attempts:
+            _finish(task, Task.FAILED, error)
+            return False
+        delay = settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1)
+        _owned(task).update(
+            status=Task.PENDING,
+            available_at=timezone.now() + timedelta(seconds=delay),
+            last_error=error,
+        )
+        return False
+    _finish(task, Task.DONE)
+    return True
+
+
+def run_next():
+    """Выполнить одну задачу. Вернуть False, если очередь пуста."""
+    task = claim_task()
+    if task is None:
+        return False
+    run_task(task)
+    return True
+
+
+def work(burst=False, poll_interval=1.0):
+    """Цикл обработчика; в режиме burst выходит, когда очередь пуста."""
+    while True:
+        close_old_connections()
+        if not run_next():
+            if burst:
+                return
+            time.sleep(poll_interval)
+
+
+def queue_stats(window=1000):
+    """Глубина очереди и задержка от постановки до выполнения, секунды."""
+    counts = dict(
+        Task.objects.order_by()
+        .values_list('status')
+        .annotate(total=Count('pk'))
+    )
+    stats = {
+        status: counts.get(status, 0) for status, _ in Task.STATUSES
+    }
+    finished = (
+        Task.objects.filter(status=Task.DONE)
+        .order_by('-finished')
+        .values_list('created', 'finished')[:window]
+    )
+    latencies = sorted(
+        (done - created).total_seconds() for created, done in finished
+    )
+    if latencies:
+        stats.update(
+            latency_avg=sum(latencies) / len(latencies),
+            latency_p50=percentile(latencies, 50),
+            latency_p95=percentile(latencies, 95),
+            latency_max=latencies[-1],
+        )
+    return stats
@@ -0,0 +1,18 @@
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi_adapter import WsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+wsgi_application = get_wsgi_application()
+
+on_startup = []
+if settings.CACHE_WARM_ON_START:
+    from posts.cache_warming import warm_cache_in_background
+
+    on_startup.append(warm_cache_in_background)
+
+application = WsgiToAsgi(wsgi_application, settings.ASGI_THREADS, on_startup)
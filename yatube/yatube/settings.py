@@ -25,6 +25,9 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'tasks.apps.TasksConfig',
+    'api.apps.ApiConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
@@ -38,13 +41,17 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.TemplateProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -54,6 +61,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.streams.async_streams',
             ],
         },
     },
@@ -94,6 +102,23 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 POST_PER_PAGE = 10
+# Страницы главной ленты с номером больше этого рендерятся без кэша.
+FEED_CACHE_PAGES = 50
+# Длина превью поста в карточках лент, символов.
+POST_PREVIEW_CHARS = 500
+GROUPS_PER_PAGE = 20
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+# Диапазон id в одном шарде sitemap; протокол допускает до 50 000 адресов.
+SITEMAP_SHARD_SIZE = 10000
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+ACCOUNT_DELETION_BATCH_SIZE = 500
+# Рекомендации «кого читать»: сколько хранить и показывать, вес путей
+# каждого сигнала и выборка подписчиков популярного автора.
+SUGGESTIONS_TOP_K = 20
+SUGGESTIONS_SHOWN = 5
+SUGGESTIONS_WEIGHTS = {'fof': 1.0, 'cofollowed': 0.2}
+SUGGESTIONS_FANOUT = 20
 
 LOGIN_URL = 'users:login'
 
@@ -101,7 +126,10 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.SpoolEmailBackend'
+
+EMAIL_SPOOL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_SPOOL_BATCH = 100
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -110,7 +138,7 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.InstrumentedLocMemCache',
     }
 }
 
@@ -119,3 +147,54 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+CACHE_WARM_ON_START = False
+CACHE_WARM_URLS = []
+CACHE_WARM_INDEX_PAGES = 3
+CACHE_WARM_GROUPS = 5
+CACHE_WARM_PROFILES = 5
+CACHE_WARM_WORKERS = 4
+
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_VISIBILITY_TIMEOUT = 300
+TASKS_WORKER_PROCESSES = 2
+
+ASGI_THREADS = 8
+
+SSE_WAIT_TIMEOUT = 25
+SSE_POLL_INTERVAL = 5
+SSE_RETRY = 1000
+
+API_MAX_LIMIT = 100
+API_BATCH_MAX = 100
+API_BATCH_CACHE_TIMEOUT = 300
+
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 10
+# REMOTE_ADDR за обратным прокси — адрес прокси: список годится только
+# при прямом подключении скрейпера. За прокси оставьте его пустым
+# и передавайте токен в заголовке «Authorization: Bearer <токен>».
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+METRICS_TOKEN = None
+
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_REPEAT_THRESHOLD = 20
+SLOW_QUERY_SAMPLE_RATE = 0.1
+
+TEMPLATE_PROFILING = False
+
+POPULAR_HALF_LIFE_HOURS = 24
+POPULAR_WEIGHTS = {'post': 1.0, 'comment': 2.0, 'follow': 5.0}
+POPULAR_MIN_WEIGHT = 0.05
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.slow_queries': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}